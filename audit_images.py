@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+from PIL import Image, UnidentifiedImageError
+
+from image_loader import read_image_file
+
+DEFAULT_MANIFEST_PATH = 'results/image_manifest.parquet'
+# Paths handed to a worker process at a time
+DEFAULT_CHUNKSIZE = 64
+
+MANIFEST_COLUMNS = ['path', 'filename', 'extension', 'size_bytes', 'format', 'width', 'height', 'mode',
+                    'sha256', 'is_html', 'is_corrupt', 'extension_mismatch', 'error']
+
+# Formats each file extension is expected to hold
+EXTENSION_FORMATS = {
+    '.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.gif': 'GIF', '.webp': 'WEBP',
+    '.avif': 'AVIF', '.bmp': 'BMP', '.tif': 'TIFF', '.tiff': 'TIFF'
+}
+_HTML_MARKERS = ('<!doctype', '<html', '<head', '<body')
+
+def iter_image_files(images_dir, extensions=None, recursive=False):
+    """
+    Yield (path, size in bytes) of the files under images_dir with os.scandir, whose
+    directory entries carry the file type and usually the size, so no extra stat per file.
+
+    Args:
+        extensions: Lowercase file extensions to keep, e.g. ('.jpg', '.png') (default: all files)
+        recursive: Also walk subdirectories
+    """
+    with os.scandir(images_dir) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    yield from iter_image_files(entry.path, extensions, recursive)
+                continue
+            if not entry.is_file():
+                continue
+            if extensions and os.path.splitext(entry.name)[1].lower() not in extensions:
+                continue
+            yield entry.path, entry.stat().st_size
+
+def probe_image(image_path, size_bytes=None, compute_sha256=True):
+    """
+    Probe one file: true format, dimensions and mode from the image header only
+    (PIL opens lazily, no pixels are decoded), plus its sha256 and HTML/corrupt flags.
+    With compute_sha256 the file is read once for both the hash and the header,
+    otherwise only its first bytes are read.
+
+    Returns:
+        dict: One manifest row, see MANIFEST_COLUMNS
+    """
+    extension = os.path.splitext(image_path)[1].lower()
+    record = {
+        'path': image_path,
+        'filename': os.path.basename(image_path),
+        'extension': extension,
+        'size_bytes': size_bytes,
+        'format': None,
+        'width': None,
+        'height': None,
+        'mode': None,
+        'sha256': None,
+        'is_html': False,
+        'is_corrupt': False,
+        'extension_mismatch': False,
+        'error': None
+    }
+    try:
+        if compute_sha256:
+            data = read_image_file(image_path)
+            record['size_bytes'] = len(data)
+            record['sha256'] = hashlib.sha256(data).hexdigest()
+            header = bytes(data[:64])
+            source = BytesIO(data)
+        else:
+            # Only the header is needed, for the HTML and AVIF checks below
+            with open(image_path, 'rb') as f:
+                header = f.read(64)
+            if record['size_bytes'] is None:
+                record['size_bytes'] = os.path.getsize(image_path)
+            source = image_path
+    except OSError as e:
+        record['is_corrupt'] = True
+        record['error'] = str(e)
+        return record
+
+    try:
+        with Image.open(source) as img:
+            record['format'] = img.format
+            record['width'], record['height'] = img.size
+            record['mode'] = img.mode
+    except Exception as e:
+        if any(marker in header.decode('utf-8', errors='ignore').lower() for marker in _HTML_MARKERS):
+            record['format'] = 'HTML'
+            record['is_html'] = True
+        elif len(header) >= 12 and header[4:12] == b'ftypavif':
+            # Pillow builds without AVIF support can still tell it from the signature
+            record['format'] = 'AVIF'
+        else:
+            record['is_corrupt'] = True
+        # PIL names the in-memory buffer instead of the file when the contents were hashed
+        record['error'] = (f"cannot identify image file {image_path!r}" if isinstance(e, UnidentifiedImageError)
+                           else str(e))
+
+    expected_format = EXTENSION_FORMATS.get(extension)
+    record['extension_mismatch'] = (expected_format is not None and record['format'] is not None
+                                    and record['format'] != expected_format)
+    return record
+
+def _probe(args):
+    return probe_image(*args)
+
+def audit_images(images_dir='imgs', manifest_path=None, extensions=None, recursive=False, max_workers=None,
+                 compute_sha256=True, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Probe every image under images_dir in a process pool and build the image manifest.
+
+    Args:
+        images_dir: Directory to audit
+        manifest_path: Where to write the manifest, Parquet or .csv by extension (optional)
+        extensions: Lowercase file extensions to audit (default: all files)
+        recursive: Also audit subdirectories
+        max_workers: Worker processes (default: one per CPU)
+        compute_sha256: Hash the file contents (default: True)
+        chunksize: Files sent to a worker at a time
+
+    Returns:
+        pd.DataFrame: One row per file in directory order, see MANIFEST_COLUMNS
+    """
+    tasks = [(path, size, compute_sha256) for path, size in iter_image_files(images_dir, extensions, recursive)]
+    if max_workers == 1 or len(tasks) <= chunksize:
+        records = [_probe(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            records = list(executor.map(_probe, tasks, chunksize=chunksize))
+
+    manifest = pd.DataFrame(records, columns=MANIFEST_COLUMNS)
+    # Keep integer columns integer despite the missing values of unreadable files
+    manifest = manifest.astype({'size_bytes': 'Int64', 'width': 'Int64', 'height': 'Int64'})
+    if manifest_path:
+        save_manifest(manifest, manifest_path)
+    return manifest
+
+def save_manifest(manifest, manifest_path):
+    if os.path.dirname(manifest_path):
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    if manifest_path.lower().endswith('.csv'):
+        manifest.to_csv(manifest_path, index=False)
+        return
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("Writing a Parquet manifest requires pyarrow: pip install pyarrow")
+    manifest.to_parquet(manifest_path, index=False)
+
+def load_manifest(manifest_path=DEFAULT_MANIFEST_PATH):
+    """Load a manifest written by audit_images, so later stages need not re-probe the files."""
+    if manifest_path.lower().endswith('.csv'):
+        return pd.read_csv(manifest_path, dtype={'sha256': str, 'error': str, 'size_bytes': 'Int64',
+                                                 'width': 'Int64', 'height': 'Int64'})
+    return pd.read_parquet(manifest_path)
+
+def print_audit_summary(manifest):
+    valid = manifest[~manifest['is_html'] & ~manifest['is_corrupt']]
+    print(f"📊 {len(manifest)} files, {len(valid)} readable images, "
+          f"{manifest['size_bytes'].sum() / 1024 / 1024:.1f}MB")
+    for image_format, count in manifest['format'].fillna('UNKNOWN').value_counts().items():
+        print(f"   • {image_format}: {count}")
+    print(f"   • HTML文件: {int(manifest['is_html'].sum())}")
+    print(f"   • 损坏文件: {int(manifest['is_corrupt'].sum())}")
+    print(f"   • 扩展名与格式不符: {int(manifest['extension_mismatch'].sum())}")
+    if manifest['sha256'].notna().any():
+        duplicates = manifest['sha256'].dropna().duplicated().sum()
+        print(f"   • 内容完全重复: {int(duplicates)}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Audit an image directory and write a Parquet manifest")
+    parser.add_argument('images_dir', nargs='?', default='imgs')
+    parser.add_argument('--output', default=DEFAULT_MANIFEST_PATH,
+                        help="Manifest path, .parquet or .csv (default: %(default)s)")
+    parser.add_argument('--extensions', help="Comma-separated extensions to audit, e.g. .jpg,.png (default: all)")
+    parser.add_argument('--recursive', action='store_true')
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--no-sha256', action='store_true', help="Skip content hashing")
+    args = parser.parse_args()
+
+    extensions = tuple(ext.strip().lower() for ext in args.extensions.split(',')) if args.extensions else None
+    manifest = audit_images(args.images_dir, args.output, extensions, args.recursive, args.workers,
+                            not args.no_sha256)
+    print_audit_summary(manifest)
+    print(f"Saved to {args.output}")
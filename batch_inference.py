@@ -0,0 +1,330 @@
+import json
+import os
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+import pandas as pd
+
+from bedrock_client import get_bedrock_client
+from checkpoint import RESULT_COLUMNS, CheckpointWriter
+from compact_output import LABEL_ID_INSTRUCTION, build_inference_config, labels_from_ids
+from gen_nova_sft_dataset import create_record
+from input_reader import iter_rows
+from label_index import get_label_index
+# Same prefill as img_tagging, so batch output parses exactly like synchronous output
+from nova_prompt_v12 import ASSISTANT_PREFILL
+from prompt_registry import DEFAULT_PROMPT_VERSION, render_system_prompt, render_user_prompt
+from response_decoder import LABEL_STATUSES, decode_response
+
+# Job states after which get_model_invocation_job will not change any more
+TERMINAL_JOB_STATES = ('Completed', 'PartiallyCompleted', 'Failed', 'Stopped', 'Expired')
+
+def split_s3_uri(s3_uri):
+    """s3://bucket/some/prefix -> ('bucket', 'some/prefix')"""
+    parsed = urlparse(s3_uri)
+    return parsed.netloc, parsed.path.lstrip('/')
+
+def build_batch_record(record_id, filename, system_prompt=None, user_prompt=None,
+                       inference_config=None, prefill=ASSISTANT_PREFILL, prompt_version=DEFAULT_PROMPT_VERSION,
+                       compact_output=False, label_ids=False):
+    """
+    Build one model-invocation record from the SFT record of create_record.
+
+    The training record's assistant answer is replaced by the prefill used at inference
+    time, and the conversation is wrapped in the Nova InvokeModel (messages-v1) schema.
+    Prompts and inference config are those img_tagging sends for the same options.
+
+    Args:
+        record_id: Unique ID of the record within the job
+        filename: Image file name under the dataset S3 prefix
+        system_prompt: System prompt text (optional, defaults to the prompt_version system prompt)
+        user_prompt: User prompt text (optional, defaults to the prompt_version user prompt)
+        inference_config: Nova inferenceConfig (default: same as img_tagging)
+        prefill: Assistant prefill text, or None to send no assistant turn
+        prompt_version: Prompt registry version
+        compact_output: Stop sequence and tight maxTokens, as in img_tagging
+        label_ids: Ask for category numbers instead of labels, as in img_tagging
+
+    Returns:
+        dict or None: {"recordId", "modelInput"}, or None if the image format is not supported
+    """
+    record = create_record('', filename)
+    if record is None:
+        return None
+
+    system = [{'text': system_prompt if system_prompt is not None else render_system_prompt(prompt_version)}]
+    user_prompt = user_prompt if user_prompt is not None else render_user_prompt(prompt_version)
+    if label_ids:
+        user_prompt += LABEL_ID_INSTRUCTION
+    user_message = record['messages'][0]
+    user_message['content'][1] = {'text': user_prompt}
+
+    messages = [user_message]
+    if prefill:
+        messages.append({'role': 'assistant', 'content': [{'text': prefill}]})
+
+    return {
+        'recordId': record_id,
+        'modelInput': {
+            'schemaVersion': 'messages-v1',
+            'system': system,
+            'messages': messages,
+            'inferenceConfig': inference_config or build_inference_config(compact_output, label_ids, prompt_version)
+        }
+    }
+
+def write_batch_input(input_file, input_jsonl, manifest_jsonl, **record_kwargs):
+    """
+    Write the batch job input JSONL and a manifest that maps record IDs back to rows.
+
+    Args:
+        input_file: Labelled sheet with 'flag' or 'tag_gt' and 'filename' or 'image' columns
+        input_jsonl: Model-invocation input file to upload
+        manifest_jsonl: Local manifest of recordId, tag_gt, image_path (and error for skipped rows)
+        **record_kwargs: Passed to build_batch_record
+
+    Returns:
+        int: Number of records written to input_jsonl
+    """
+    num_records = 0
+    with open(input_jsonl, 'w', encoding='utf-8') as input_f, \
+            open(manifest_jsonl, 'w', encoding='utf-8') as manifest_f:
+        for index, row in enumerate(iter_rows(input_file)):
+            record_id = f"{index:08d}"
+            tag_gt = row.get('tag_gt', row.get('flag'))
+            filename = row.get('image', row.get('filename'))
+            entry = {'recordId': record_id, 'tag_gt': tag_gt, 'image_path': filename}
+
+            record = build_batch_record(record_id, filename, **record_kwargs)
+            if record is None:
+                entry['error'] = f"Unsupported image format for batch inference: {filename}"
+            else:
+                input_f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                num_records += 1
+            manifest_f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+
+    print(f"Generated {num_records} batch records in {input_jsonl}")
+    return num_records
+
+def submit_batch_job(bedrock_client, job_name, model_id, role_arn, input_s3_uri, output_s3_uri):
+    """Create a model invocation job and return its ARN."""
+    response = bedrock_client.create_model_invocation_job(
+        jobName=job_name,
+        roleArn=role_arn,
+        modelId=model_id,
+        inputDataConfig={'s3InputDataConfig': {'s3Uri': input_s3_uri}},
+        outputDataConfig={'s3OutputDataConfig': {'s3Uri': output_s3_uri}}
+    )
+    job_arn = response['jobArn']
+    print(f"🚀 Submitted batch job {job_name}: {job_arn}")
+    return job_arn
+
+def wait_for_batch_job(bedrock_client, job_arn, poll_interval=60, timeout=None, sleep=time.sleep):
+    """
+    Poll a model invocation job until it reaches a terminal state.
+
+    Returns:
+        dict: The final get_model_invocation_job response
+    """
+    start = time.time()
+    while True:
+        job = bedrock_client.get_model_invocation_job(jobIdentifier=job_arn)
+        status = job['status']
+        if status in TERMINAL_JOB_STATES:
+            print(f"🏁 Batch job {status}: {job_arn}")
+            return job
+        if timeout is not None and time.time() - start > timeout:
+            raise TimeoutError(f"Batch job still {status} after {timeout}s: {job_arn}")
+        print(f"⏳ Batch job {status}, checking again in {poll_interval}s")
+        sleep(poll_interval)
+
+def download_batch_output(s3_client, output_s3_uri, job_arn, local_dir):
+    """
+    Download the *.jsonl.out files of a finished job.
+
+    Bedrock writes them under <output_s3_uri>/<job id>/.
+
+    Returns:
+        list: Local paths of the downloaded output files
+    """
+    bucket, prefix = split_s3_uri(output_s3_uri)
+    job_id = job_arn.split('/')[-1]
+    job_prefix = f"{prefix.rstrip('/')}/{job_id}/" if prefix else f"{job_id}/"
+
+    os.makedirs(local_dir, exist_ok=True)
+    paths = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=job_prefix):
+        for obj in page.get('Contents', []):
+            if not obj['Key'].endswith('.jsonl.out'):
+                continue
+            local_path = os.path.join(local_dir, os.path.basename(obj['Key']))
+            s3_client.download_file(bucket, obj['Key'], local_path)
+            paths.append(local_path)
+    return paths
+
+def parse_batch_output(output_paths, manifest_jsonl, prompt_version=DEFAULT_PROMPT_VERSION, label_ids=False,
+                       normalize_labels=True, records_jsonl=None):
+    """
+    Parse batch output back into the result schema of process_excel_data. With label_ids,
+    category numbers are mapped back to the labels of prompt_version, and with
+    normalize_labels the labels are canonicalized exactly as process_excel_data does,
+    so batch and synchronous results of the same answer are identical.
+
+    Args:
+        output_paths: Downloaded *.jsonl.out files
+        manifest_jsonl: Manifest written by write_batch_input
+        prompt_version: Prompt registry version the records were built with
+        label_ids: The records asked for category numbers
+        normalize_labels: Map labels to the canonical category names (default: True)
+        records_jsonl: Also write one checkpoint-style record per row here, with
+                       raw_inference_result and oov_labels where normalization applied (optional)
+
+    Returns:
+        tuple: (pd.DataFrame with tag_gt/image_path/inference_result in input order,
+                dict of token totals and out-of-vocabulary label counts)
+    """
+    label_index = get_label_index() if normalize_labels else None
+    outputs = {}
+    usage_totals = {'input_tokens': 0, 'output_tokens': 0, 'oov_rows': 0, 'oov_labels': Counter()}
+    for path in output_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                model_output = record.get('modelOutput')
+                if model_output is None:
+                    error = record.get('error', {})
+                    message = error.get('errorMessage', error) if isinstance(error, dict) else error
+                    outputs[record['recordId']] = {'inference_result': f"错误: {message}", 'error': str(message)}
+                    continue
+                usage = model_output.get('usage', {})
+                usage_totals['input_tokens'] += usage.get('inputTokens', 0)
+                usage_totals['output_tokens'] += usage.get('outputTokens', 0)
+                text = model_output['output']['message']['content'][0]['text']
+                result, decode_status = decode_response(text)
+                if label_ids and decode_status in LABEL_STATUSES:
+                    result = labels_from_ids(result, prompt_version)
+                output = {'inference_result': result, 'decode_status': decode_status.value}
+                if label_index is not None and decode_status in LABEL_STATUSES:
+                    labels, oov = label_index.canonicalize(result)
+                    # Unknown labels are kept, so they still count as false positives
+                    output['inference_result'] = ','.join(labels + oov)
+                    if output['inference_result'] != result:
+                        output['raw_inference_result'] = result
+                    if oov:
+                        output['oov_labels'] = oov
+                        usage_totals['oov_rows'] += 1
+                        usage_totals['oov_labels'].update(oov)
+                outputs[record['recordId']] = output
+
+    results = []
+    writer = CheckpointWriter(records_jsonl) if records_jsonl else None
+    with open(manifest_jsonl, 'r', encoding='utf-8') as f:
+        for index, line in enumerate(f):
+            entry = json.loads(line)
+            if 'error' in entry:
+                output = {'inference_result': f"错误: {entry['error']}", 'error': entry['error']}
+            else:
+                output = outputs.get(entry['recordId'], {'inference_result': "错误: missing from batch output",
+                                                         'error': "missing from batch output"})
+            record = {'row_index': index, 'tag_gt': entry['tag_gt'], 'image_path': entry['image_path'],
+                      'error': None, **output}
+            results.append(record)
+            if writer is not None:
+                writer.write(record)
+    if writer is not None:
+        writer.close()
+    return pd.DataFrame(results, columns=RESULT_COLUMNS), usage_totals
+
+def run_batch_tagging(input_file, output_file, role_arn, input_s3_uri, output_s3_uri,
+                      model_id="us.amazon.nova-lite-v1:0", region="us-west-2", job_name=None,
+                      work_dir='batch_jobs', poll_interval=60, bedrock_client=None, s3_client=None,
+                      prompt_version=DEFAULT_PROMPT_VERSION, compact_output=False, label_ids=False,
+                      normalize_labels=True, **record_kwargs):
+    """
+    Tag a whole sheet with Bedrock Batch Inference instead of one Converse call per image.
+
+    Steps: write the model-invocation JSONL, upload it, submit the job, poll it,
+    download the output and write the same result sheet as process_excel_data.
+    Bedrock requires a minimum number of records per job (100 for most models).
+
+    Args:
+        input_file: Labelled sheet (xlsx, csv, parquet or jsonl)
+        output_file: Output Excel file path
+        role_arn: IAM service role Bedrock assumes to read the input and images and write the output
+        input_s3_uri: S3 URI of the uploaded input JSONL, e.g. s3://bucket/batch/input.jsonl
+        output_s3_uri: S3 prefix for the job output, e.g. s3://bucket/batch/output/
+        model_id: Nova model ID
+        region: AWS region
+        job_name: Batch job name (default: derived from the current time)
+        work_dir: Local directory for the input, manifest and downloaded output
+        poll_interval: Seconds between job status checks
+        bedrock_client: Client for the "bedrock" control plane (optional, e.g. a local stub)
+        s3_client: S3 client (optional, e.g. a local stub)
+        prompt_version: Prompt registry version
+        compact_output: Stop sequence and tight maxTokens, as in img_tagging
+        label_ids: Ask for category numbers and map them back to labels, as in img_tagging
+        normalize_labels: Map output labels to the canonical category names, as process_excel_data
+                          does (default: True). Per-row records with the raw results and
+                          out-of-vocabulary labels are kept in <work_dir>/<job_name>/results.jsonl.
+        **record_kwargs: Passed to build_batch_record
+
+    Returns:
+        pd.DataFrame: The result sheet
+    """
+    bedrock_client = bedrock_client or get_bedrock_client(region, service_name='bedrock')
+    s3_client = s3_client or get_bedrock_client(region, service_name='s3')
+    job_name = job_name or f"nova-image-tagging-{time.strftime('%Y%m%d-%H%M%S')}"
+
+    job_dir = os.path.join(work_dir, job_name)
+    os.makedirs(job_dir, exist_ok=True)
+    input_jsonl = os.path.join(job_dir, 'input.jsonl')
+    manifest_jsonl = os.path.join(job_dir, 'manifest.jsonl')
+
+    write_batch_input(input_file, input_jsonl, manifest_jsonl, prompt_version=prompt_version,
+                      compact_output=compact_output, label_ids=label_ids, **record_kwargs)
+    bucket, key = split_s3_uri(input_s3_uri)
+    s3_client.upload_file(input_jsonl, bucket, key)
+
+    job_arn = submit_batch_job(bedrock_client, job_name, model_id, role_arn, input_s3_uri, output_s3_uri)
+    job = wait_for_batch_job(bedrock_client, job_arn, poll_interval)
+    if job['status'] not in ('Completed', 'PartiallyCompleted'):
+        raise Exception(f"Batch job {job['status']}: {job.get('message', '')}")
+
+    output_paths = download_batch_output(s3_client, output_s3_uri, job_arn, os.path.join(job_dir, 'output'))
+    result_df, usage_totals = parse_batch_output(output_paths, manifest_jsonl, prompt_version, label_ids,
+                                                 normalize_labels, os.path.join(job_dir, 'results.jsonl'))
+    result_df.to_excel(output_file, index=False)
+
+    print(f"📋 Batch tagging finished: {len(result_df)} rows saved to {output_file}")
+    print(f"🔢 Tokens - Input: {usage_totals['input_tokens']:,}, Output: {usage_totals['output_tokens']:,}")
+    if usage_totals['oov_rows']:
+        print(f"   • 词表外标签: {usage_totals['oov_rows']} 条 ({len(usage_totals['oov_labels'])} 种)")
+        for label, count in usage_totals['oov_labels'].most_common(10):
+            print(f"     - {label}: {count} 次")
+    return result_df
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tag a labelled sheet with Bedrock Batch Inference")
+    parser.add_argument('input_file', help="Labelled sheet, e.g. test_data.xlsx")
+    parser.add_argument('output_file', help="Result sheet, e.g. results/test_data_batch.xlsx")
+    parser.add_argument('--role-arn', required=True)
+    parser.add_argument('--input-s3-uri', required=True)
+    parser.add_argument('--output-s3-uri', required=True)
+    parser.add_argument('--model-id', default="us.amazon.nova-lite-v1:0")
+    parser.add_argument('--region', default="us-west-2")
+    parser.add_argument('--job-name', default=None)
+    parser.add_argument('--prompt-version', default=DEFAULT_PROMPT_VERSION)
+    parser.add_argument('--compact-output', action='store_true')
+    parser.add_argument('--label-ids', action='store_true')
+    args = parser.parse_args()
+
+    run_batch_tagging(args.input_file, args.output_file, args.role_arn, args.input_s3_uri, args.output_s3_uri,
+                      model_id=args.model_id, region=args.region, job_name=args.job_name,
+                      prompt_version=args.prompt_version, compact_output=args.compact_output,
+                      label_ids=args.label_ids)
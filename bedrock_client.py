@@ -0,0 +1,70 @@
+import threading
+
+import boto3
+from botocore.config import Config
+
+# Default size of the urllib3 connection pool behind each client. botocore's own
+# default is 10, which starves a thread pool with more workers than that.
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+
+# Cached clients keyed by (service_name, region, access_key, secret_key).
+# Each entry is (client, max_pool_connections).
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_bedrock_client(region="us-west-2", aws_access_key_id=None, aws_secret_access_key=None,
+                       service_name="bedrock-runtime", max_pool_connections=None, tcp_keepalive=True):
+    """
+    Return a shared, pooled boto3 client, creating it on first use.
+
+    Building a client re-runs credential resolution, endpoint loading and botocore
+    model parsing, and a new client opens new HTTPS connections. Reusing one client
+    per (service, region, credentials) keeps the connections alive across calls.
+    boto3 clients are thread-safe, so the same client is shared by all workers.
+    The model ID is not part of the key because a client is not bound to a model.
+
+    Args:
+        region: AWS region
+        aws_access_key_id: AWS access key (optional, uses default credential chain if None)
+        aws_secret_access_key: AWS secret key (optional)
+        service_name: boto3 service name (default: "bedrock-runtime")
+        max_pool_connections: Connection pool size. If a cached client has a smaller
+                              pool, it is replaced by a larger one.
+        tcp_keepalive: Enable TCP keep-alive on pooled connections (default: True)
+
+    Returns:
+        botocore.client.BaseClient: The shared client
+    """
+    max_pool_connections = max_pool_connections or DEFAULT_MAX_POOL_CONNECTIONS
+    use_explicit_credentials = bool(aws_access_key_id and aws_secret_access_key)
+    if not use_explicit_credentials:
+        aws_access_key_id = aws_secret_access_key = None
+    key = (service_name, region, aws_access_key_id, aws_secret_access_key)
+
+    with _clients_lock:
+        cached = _clients.get(key)
+        if cached is not None and cached[1] >= max_pool_connections:
+            return cached[0]
+
+        config = Config(max_pool_connections=max_pool_connections, tcp_keepalive=tcp_keepalive)
+        # Sessions are not thread-safe, so each client gets its own session built under the lock
+        if use_explicit_credentials:
+            session = boto3.session.Session(
+                aws_access_key_id=aws_access_key_id,
+                aws_secret_access_key=aws_secret_access_key,
+                region_name=region
+            )
+            print(f"Using explicit AWS credentials for region: {region}")
+        else:
+            # Use default credential chain (environment variables, AWS credentials file, IAM roles, etc.)
+            session = boto3.session.Session(region_name=region)
+            print(f"Using default AWS credential chain for region: {region}")
+
+        client = session.client(service_name, region_name=region, config=config)
+        _clients[key] = (client, max_pool_connections)
+        return client
+
+def clear_client_cache():
+    """Drop all cached clients, e.g. after rotating credentials."""
+    with _clients_lock:
+        _clients.clear()
@@ -0,0 +1,79 @@
+import argparse
+import os
+
+import pandas as pd
+
+from calculate_metrics import calculate_metrics
+from nova_prompt_v12 import process_excel_data
+
+def summarize_metrics(metric_df):
+    """Micro/macro precision and recall from a calculate_metrics result."""
+    tp, fp, fn = metric_df['TP'].sum(), metric_df['FP'].sum(), metric_df['FN'].sum()
+    return {
+        'micro_precision': tp / (tp + fp) if (tp + fp) > 0 else 0,
+        'micro_recall': tp / (tp + fn) if (tp + fn) > 0 else 0,
+        'macro_precision': metric_df['Precision'].mean() if len(metric_df) else 0,
+        'macro_recall': metric_df['Recall'].mean() if len(metric_df) else 0
+    }
+
+def run_benchmark(excel_file, images_dir, output_dir='results/benchmark_downscale', max_long_edges=(None, 1568, 1024, 768, 512),
+                  max_image_bytes=None, model_id="us.amazon.nova-lite-v1:0", region="us-west-2", max_workers=4):
+    """
+    Tag the same labelled sheet once per downscaling setting and compare accuracy,
+    payload size, input tokens and wall time.
+
+    Args:
+        excel_file: Labelled test sheet (tag_gt + image columns)
+        images_dir: Directory containing the local images
+        output_dir: Where per-setting result sheets and the summary CSV are written
+        max_long_edges: Long-edge limits to compare; None means the original images
+        max_image_bytes: Byte budget applied to every downscaled setting (optional)
+        model_id: Nova model ID
+        region: AWS region
+        max_workers: Concurrent Bedrock calls per run
+
+    Returns:
+        pd.DataFrame: One row per setting
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rows = []
+    for max_long_edge in max_long_edges:
+        name = f"edge_{max_long_edge or 'original'}"
+        output_file = os.path.join(output_dir, f"{name}.xlsx")
+        summary = process_excel_data(excel_file, output_file, images_dir, region=region, model_id=model_id,
+                                     max_workers=max_workers, max_long_edge=max_long_edge,
+                                     max_image_bytes=max_image_bytes if max_long_edge else None)
+        metric_df = calculate_metrics(pd.read_excel(output_file))
+        billed = max(1, summary['successful_requests'] - summary['result_cache_hits'])
+        rows.append({
+            'setting': name,
+            **summarize_metrics(metric_df),
+            'avg_input_tokens': summary['total_input_tokens'] / billed,
+            # Image sizes are only recorded when the downscaling stage runs
+            'sent_mb': summary['sent_image_bytes'] / 1024 / 1024 if max_long_edge else None,
+            'original_mb': summary['original_image_bytes'] / 1024 / 1024 if max_long_edge else None,
+            'failed_requests': summary['failed_requests'],
+            'elapsed_seconds': summary['elapsed_seconds']
+        })
+
+    result_df = pd.DataFrame(rows)
+    result_df.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+    print(result_df.to_string(index=False))
+    return result_df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark image downscaling against tagging accuracy")
+    parser.add_argument('excel_file', help="Labelled test sheet, e.g. test_data.xlsx")
+    parser.add_argument('images_dir', help="Directory containing the local images")
+    parser.add_argument('--edges', default='0,1568,1024,768,512',
+                        help="Comma-separated max long edges to compare, 0 = original (default: %(default)s)")
+    parser.add_argument('--max-image-bytes', type=int, default=None)
+    parser.add_argument('--model-id', default="us.amazon.nova-lite-v1:0")
+    parser.add_argument('--region', default="us-west-2")
+    parser.add_argument('--max-workers', type=int, default=4)
+    parser.add_argument('--output-dir', default='results/benchmark_downscale')
+    args = parser.parse_args()
+
+    edges = [int(edge) or None for edge in args.edges.split(',')]
+    run_benchmark(args.excel_file, args.images_dir, args.output_dir, edges, args.max_image_bytes,
+                  args.model_id, args.region, args.max_workers)
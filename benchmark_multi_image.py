@@ -0,0 +1,73 @@
+import argparse
+import os
+
+import pandas as pd
+
+from benchmark_downscale import summarize_metrics
+from calculate_metrics import calculate_metrics
+from nova_prompt_v12 import process_excel_data
+
+def run_benchmark(excel_file, images_dir, output_dir='results/benchmark_multi_image', group_sizes=(1, 2, 4, 8),
+                  model_id="us.amazon.nova-lite-v1:0", region="us-west-2", max_workers=4, compact_output=False):
+    """
+    Tag the same labelled sheet once per images-per-request setting and compare accuracy
+    against single-image requests, together with tokens, cost and wall time.
+
+    Args:
+        excel_file: Labelled test sheet (tag_gt + image columns)
+        images_dir: Directory containing the local images
+        output_dir: Where per-setting result sheets and the summary CSV are written
+        group_sizes: Images per request to compare; 1 is the single-image baseline
+        model_id: Nova model ID
+        region: AWS region
+        max_workers: Concurrent Bedrock calls per run
+        compact_output: Use the compact output mode in every run
+
+    Returns:
+        pd.DataFrame: One row per setting, with micro precision/recall deltas against the first setting
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rows = []
+    for images_per_request in group_sizes:
+        name = f"images_{images_per_request}"
+        output_file = os.path.join(output_dir, f"{name}.xlsx")
+        summary = process_excel_data(excel_file, output_file, images_dir, region=region, model_id=model_id,
+                                     max_workers=max_workers, images_per_request=images_per_request,
+                                     compact_output=compact_output)
+        metric_df = calculate_metrics(pd.read_excel(output_file))
+        images = max(1, summary['successful_requests'])
+        rows.append({
+            'setting': name,
+            **summarize_metrics(metric_df),
+            'input_tokens_per_image': summary['total_input_tokens'] / images,
+            'cache_read_tokens_per_image': summary['cache_read_tokens'] / images,
+            'output_tokens_per_image': summary['total_output_tokens'] / images,
+            'cost_per_image': summary['cost_per_image'],
+            'multi_image_fallbacks': summary['multi_image_fallbacks'],
+            'failed_requests': summary['failed_requests'],
+            'elapsed_seconds': summary['elapsed_seconds']
+        })
+
+    result_df = pd.DataFrame(rows)
+    for metric in ('micro_precision', 'micro_recall'):
+        result_df[f'{metric}_delta'] = result_df[metric] - result_df[metric].iloc[0]
+    result_df.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+    print(result_df.to_string(index=False))
+    return result_df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark multi-image requests against single-image accuracy")
+    parser.add_argument('excel_file', help="Labelled test sheet, e.g. test_data.xlsx")
+    parser.add_argument('images_dir', help="Directory containing the local images")
+    parser.add_argument('--group-sizes', default='1,2,4,8',
+                        help="Comma-separated images per request to compare (default: %(default)s)")
+    parser.add_argument('--model-id', default="us.amazon.nova-lite-v1:0")
+    parser.add_argument('--region', default="us-west-2")
+    parser.add_argument('--max-workers', type=int, default=4)
+    parser.add_argument('--compact-output', action='store_true')
+    parser.add_argument('--output-dir', default='results/benchmark_multi_image')
+    args = parser.parse_args()
+
+    group_sizes = [int(size) for size in args.group_sizes.split(',')]
+    run_benchmark(args.excel_file, args.images_dir, args.output_dir, group_sizes, args.model_id, args.region,
+                  args.max_workers, args.compact_output)
@@ -1,68 +1,48 @@
 import pandas as pd
 import sys
-from collections import defaultdict
 
-# Get xlsx file from command line argument
-if len(sys.argv) != 2:
-    print("Usage: python calculate_metrics.py <xlsx_file>")
-    sys.exit(1)
+from label_metrics import AGGREGATE_LABELS, compute_metrics
 
-xlsx_file = sys.argv[1]
+def calculate_metrics(df, ground_truth_col='tag_gt', predictions_col='inference_result', legacy_fp=True):
+    """
+    Per-label precision/recall of comma-separated predictions against (multi-label) ground truth.
 
-# Read Excel file
-df = pd.read_excel(xlsx_file)
+    Args:
+        legacy_fp: Only count false positives for labels that appear in the ground truth,
+                   as earlier versions of this script did. Set False to count every predicted label.
 
-# Get ground truth and predictions using column names
-# You can modify these column names to match your Excel file
-ground_truth_col = 'tag_gt'  # Change this to your actual column name
-predictions_col = 'inference_result'    # Change this to your actual column name
+    Returns:
+        pd.DataFrame: One row per label with Precision, Recall, TP, FP, FN
+    """
+    report, _ = compute_metrics(df[ground_truth_col].astype(str), df[predictions_col].astype(str),
+                                restrict_to_ground_truth=legacy_fp, top_k=())
+    per_label = report[~report['Label'].isin(AGGREGATE_LABELS)]
+    return per_label[['Label', 'Precision', 'Recall', 'TP', 'FP', 'FN']].reset_index(drop=True)
 
-try:
-    ground_truth = df[ground_truth_col].astype(str)
-    predictions = df[predictions_col].astype(str)
-except KeyError as e:
-    print(f"Error: Column {e} not found in Excel file.")
-    print(f"Available columns: {list(df.columns)}")
-    sys.exit(1)
+if __name__ == "__main__":
+    # Get xlsx file from command line argument
+    if len(sys.argv) != 2:
+        print("Usage: python calculate_metrics.py <xlsx_file>")
+        sys.exit(1)
 
-ground_truth_set = set(ground_truth)
+    xlsx_file = sys.argv[1]
 
-# Calculate metrics for each label
-label_stats = defaultdict(lambda: {'tp': 0, 'fp': 0, 'fn': 0})
+    # Read Excel file
+    df = pd.read_excel(xlsx_file)
 
-for gt, pred in zip(ground_truth, predictions):
-    pred_list = [p.strip() for p in pred.split(',') if p.strip()]
-    
-    # True positive: ground truth appears in predictions
-    if gt in pred_list:
-        label_stats[gt]['tp'] += 1
-    else:
-        label_stats[gt]['fn'] += 1
-    
-    # False positives: predicted labels that don't match ground truth
-    for p in pred_list:
-        if p != gt and p in ground_truth_set:
-            label_stats[p]['fp'] += 1
+    # Get ground truth and predictions using column names
+    # You can modify these column names to match your Excel file
+    ground_truth_col = 'tag_gt'  # Change this to your actual column name
+    predictions_col = 'inference_result'    # Change this to your actual column name
 
-# Calculate and save results
-results = []
-for label in sorted(label_stats.keys()):
-    stats = label_stats[label]
-    
-    precision = stats['tp'] / (stats['tp'] + stats['fp']) if (stats['tp'] + stats['fp']) > 0 else 0
-    recall = stats['tp'] / (stats['tp'] + stats['fn']) if (stats['tp'] + stats['fn']) > 0 else 0
-    
-    results.append({
-        'Label': label,
-        'Precision': precision,
-        'Recall': recall,
-        'TP': stats['tp'],
-        'FP': stats['fp'],
-        'FN': stats['fn']
-    })
+    try:
+        results_df = calculate_metrics(df, ground_truth_col, predictions_col)
+    except KeyError as e:
+        print(f"Error: Column {e} not found in Excel file.")
+        print(f"Available columns: {list(df.columns)}")
+        sys.exit(1)
 
-# Save to CSV
-results_df = pd.DataFrame(results)
-metric_file= xlsx_file.replace('.xlsx', '_metric.csv')
+    # Save to CSV
+    metric_file= xlsx_file.replace('.xlsx', '_metric.csv')
 
-results_df.to_csv(metric_file, index=False)
\ No newline at end of file
+    results_df.to_csv(metric_file, index=False)
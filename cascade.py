@@ -0,0 +1,246 @@
+from functools import lru_cache, partial
+
+import pandas as pd
+
+from checkpoint import iter_checkpoint
+from compact_output import STOP_SEQUENCES
+from image_loader import load_image
+from image_preprocess import downscale_image
+from label_index import NO_MATCH_LABEL
+from label_metrics import compute_metrics
+from nova_prompt_v12 import (_build_system_config, _converse_with_retry, _get_client, _print_usage, _usage_metrics,
+                             img_tagging, process_excel_data)
+from pricing import estimate_cost
+from prompt_registry import DEFAULT_PROMPT_VERSION, get_categories, get_groups
+from response_decoder import LABEL_STATUSES, decode_response
+
+DEFAULT_STAGE1_MODEL_ID = "us.amazon.nova-lite-v1:0"
+DEFAULT_MAX_GROUPS = 3
+# Subgroup (or category) names listed per group as hints in the group prompt
+MAX_GROUP_HINTS = 8
+
+STAGE1_PREFILL = 'Here are the matching groups:\n```json'
+STAGE1_INFERENCE_CONFIG = {'maxTokens': 24, 'topP': 0.01, 'temperature': 0, 'stopSequences': STOP_SEQUENCES}
+
+GROUP_SYSTEM_PROMPT = """You are screening e-commerce product images for restricted product categories.
+Decide which of the category GROUPS below the item(s) in the image could belong to.
+
+## Category Groups
+{groups}
+## Output
+- Output up to {max_groups} group numbers, most likely first, in the JSON format {{"result":"2,5"}}
+- Include every group that plausibly applies; missing a group is worse than an extra one
+- If the item clearly belongs to none of the groups, return {{"result":"0"}}"""
+
+GROUP_USER_PROMPT = "Which category groups could the item(s) in this image belong to?"
+
+@lru_cache(maxsize=16)
+def render_group_prompt(version=DEFAULT_PROMPT_VERSION, max_groups=DEFAULT_MAX_GROUPS):
+    """
+    Group-selection system prompt of the first stage, assembled from the prompt registry:
+    one numbered line per top-level group with its subgroup (or category) names as hints.
+    """
+    categories = get_categories(version)
+    lines = []
+    for number, group in enumerate(get_groups(version), start=1):
+        members = [category for category in categories if category.group == group]
+        hints = []
+        for category in members:
+            hint = category.subgroup or category.name
+            if hint not in hints:
+                hints.append(hint)
+        lines.append(f"{number}. **{group}**: {', '.join(hints[:MAX_GROUP_HINTS])}")
+    return GROUP_SYSTEM_PROMPT.format(groups='\n'.join(lines) + '\n', max_groups=max_groups)
+
+def groups_from_numbers(result, version=DEFAULT_PROMPT_VERSION, max_groups=DEFAULT_MAX_GROUPS):
+    """
+    Map the first stage's comma-separated group numbers to group names. Unknown numbers,
+    including the "0" answer for no group, are dropped.
+    """
+    groups = get_groups(version)
+    selected = []
+    for piece in result.replace('，', ',').split(','):
+        piece = piece.strip()
+        if piece.isdigit() and 1 <= int(piece) <= len(groups) and groups[int(piece) - 1] not in selected:
+            selected.append(groups[int(piece) - 1])
+    return selected[:max_groups]
+
+def select_groups(image_input, client, model_id=DEFAULT_STAGE1_MODEL_ID, prompt_version=DEFAULT_PROMPT_VERSION,
+                  max_groups=DEFAULT_MAX_GROUPS, use_cache=True, rate_limiter=None, max_retries=3,
+                  max_long_edge=None, max_image_bytes=None, derived_cache=None, url_fetcher=None):
+    """
+    First stage: ask a cheap model which top-level groups an image could belong to.
+
+    Returns:
+        tuple: (list of group names in registry order, empty if none apply; metrics dict
+                including the model_id and the decoded answer)
+    """
+    image_bytes, bedrock_format = load_image(image_input, derived_cache, url_fetcher)
+    if max_long_edge or max_image_bytes:
+        image_bytes, bedrock_format, _ = downscale_image(image_bytes, bedrock_format, max_long_edge, max_image_bytes)
+
+    messages = [
+        {'role': 'user', 'content': [
+            {'image': {'format': bedrock_format, 'source': {'bytes': image_bytes}}},
+            {'text': GROUP_USER_PROMPT}
+        ]},
+        {'role': 'assistant', 'content': [{'text': STAGE1_PREFILL}]}
+    ]
+    system_config = _build_system_config(render_group_prompt(prompt_version, max_groups), use_cache)
+    response = _converse_with_retry(client, model_id, messages, system_config, STAGE1_INFERENCE_CONFIG,
+                                    rate_limiter, max_retries)
+    metrics = _usage_metrics(response['usage'])
+    _print_usage(metrics)
+
+    result, status = decode_response(response['output']['message']['content'][0]['text'])
+    metrics['model_id'] = model_id
+    metrics['answer'] = result
+    metrics['decode_status'] = status.value
+    if status not in LABEL_STATUSES:
+        # An unusable answer must not hide categories: fall back to all groups
+        return get_groups(prompt_version), metrics
+
+    selected = groups_from_numbers(result, prompt_version, max_groups)
+    # Registry order keeps one system prompt (and prompt-cache entry) per group subset
+    return [group for group in get_groups(prompt_version) if group in selected], metrics
+
+def cascade_tagging(image_input, return_metrics=False, stage1_model_id=DEFAULT_STAGE1_MODEL_ID,
+                    max_groups=DEFAULT_MAX_GROUPS, skip_no_group=True, **tagging_kwargs):
+    """
+    Two-stage tagging: a cheap group classifier picks the relevant top-level groups, then
+    img_tagging sees only those groups' category definitions.
+
+    Args:
+        image_input: Local file path or URL of the image
+        return_metrics: If True, returns (text, metrics) like img_tagging
+        stage1_model_id: Model of the group classifier
+        max_groups: Maximum number of groups passed on to the second stage
+        skip_no_group: If the first stage finds no group, answer "无" without a second request
+        **tagging_kwargs: Passed to img_tagging (model_id, client, prompt_version, ...)
+
+    Returns:
+        str or tuple: The second-stage answer, or (text, metrics). Metrics are those of the
+                      second stage, with the first stage under 'stage1' and the selected 'groups'.
+    """
+    prompt_version = tagging_kwargs.get('prompt_version', DEFAULT_PROMPT_VERSION)
+    client = tagging_kwargs.get('client')
+    if client is None:
+        client = _get_client(tagging_kwargs.get('region', "us-west-2"), tagging_kwargs.get('aws_access_key_id'),
+                             tagging_kwargs.get('aws_secret_access_key'))
+        tagging_kwargs['client'] = client
+
+    try:
+        groups, stage1_metrics = select_groups(
+            image_input, client, stage1_model_id, prompt_version, max_groups,
+            use_cache=tagging_kwargs.get('use_cache', True), rate_limiter=tagging_kwargs.get('rate_limiter'),
+            max_retries=tagging_kwargs.get('max_retries', 3), max_long_edge=tagging_kwargs.get('max_long_edge'),
+            max_image_bytes=tagging_kwargs.get('max_image_bytes'), derived_cache=tagging_kwargs.get('derived_cache'),
+            url_fetcher=tagging_kwargs.get('url_fetcher'))
+    except Exception as e:
+        raise Exception(f"Error in cascade stage 1: {str(e)}")
+
+    if not groups and skip_no_group:
+        text = f'{{"result":"{NO_MATCH_LABEL}"}}'
+        metrics = {'input_tokens': 0, 'output_tokens': 0, 'total_tokens': 0, 'stage2_skipped': True}
+    else:
+        text, metrics = img_tagging(image_input, return_metrics=True, groups=tuple(groups) or None, **tagging_kwargs)
+    metrics['stage1'] = stage1_metrics
+    metrics['groups'] = groups
+
+    if return_metrics:
+        return text, metrics
+    return text
+
+def process_excel_data_cascade(excel_file, output_file, images_dir, stage1_model_id=DEFAULT_STAGE1_MODEL_ID,
+                               max_groups=DEFAULT_MAX_GROUPS, skip_no_group=True, **kwargs):
+    """process_excel_data with cascade_tagging as the per-row tagger; kwargs as for process_excel_data."""
+    tag_function = partial(cascade_tagging, stage1_model_id=stage1_model_id, max_groups=max_groups,
+                           skip_no_group=skip_no_group)
+    return process_excel_data(excel_file, output_file, images_dir, tag_function=tag_function, **kwargs)
+
+def cascade_report(checkpoint_file, model_id, prompt_version=DEFAULT_PROMPT_VERSION):
+    """
+    Per-stage cost and accuracy of a cascade run from its checkpoint.
+
+    Stage 1 is scored by group recall: the share of rows whose ground-truth labels'
+    groups were all selected. Stage 2 is scored by micro precision/recall of the final labels.
+
+    Returns:
+        pd.DataFrame: One row per stage plus a total
+    """
+    group_of_label = {category.label: category.group for category in get_categories(prompt_version)}
+    records = {}
+    for record in iter_checkpoint(checkpoint_file):
+        records[record['row_index']] = record
+
+    stage_tokens = {'stage1': [0, 0, 0, 0, 0.0], 'stage2': [0, 0, 0, 0, 0.0]}
+    group_hits = group_rows = skipped = requests = 0
+    ground_truth, predictions = [], []
+    for record in records.values():
+        metrics = record.get('metrics')
+        if not metrics or 'stage1' not in metrics:
+            continue
+        requests += 1
+        ground_truth.append(record['tag_gt'])
+        predictions.append(record['inference_result'])
+        stage1 = metrics['stage1']
+        for stage, stage_metrics, stage_model in (('stage1', stage1, stage1['model_id']), ('stage2', metrics, model_id)):
+            usage = (stage_metrics.get('input_tokens', 0), stage_metrics.get('output_tokens', 0),
+                     stage_metrics.get('cache_read_tokens', 0), stage_metrics.get('cache_creation_tokens', 0))
+            totals = stage_tokens[stage]
+            for i, value in enumerate(usage):
+                totals[i] += value
+            totals[4] += estimate_cost(stage_model, *usage) or 0.0
+        skipped += bool(metrics.get('stage2_skipped'))
+        gt_groups = {group_of_label[label] for label in str(record['tag_gt']).split(',') if label in group_of_label}
+        if gt_groups:
+            group_rows += 1
+            group_hits += gt_groups.issubset(metrics.get('groups') or [])
+
+    _, summary = compute_metrics(ground_truth, predictions, top_k=())
+    rows = []
+    for stage, (input_tokens, output_tokens, cache_read, cache_write, cost) in stage_tokens.items():
+        rows.append({
+            'stage': stage,
+            'requests': requests - skipped if stage == 'stage2' else requests,
+            'input_tokens_per_image': input_tokens / requests if requests else 0,
+            'cache_read_tokens_per_image': cache_read / requests if requests else 0,
+            'output_tokens_per_image': output_tokens / requests if requests else 0,
+            'cost': cost,
+            'cost_per_image': cost / requests if requests else 0,
+            'group_recall': group_hits / group_rows if stage == 'stage1' and group_rows else None,
+            'micro_precision': summary['micro_precision'] if stage == 'stage2' else None,
+            'micro_recall': summary['micro_recall'] if stage == 'stage2' else None
+        })
+    total_cost = sum(row['cost'] for row in rows)
+    rows.append({'stage': 'total', 'requests': requests, 'cost': total_cost,
+                 'cost_per_image': total_cost / requests if requests else 0,
+                 'micro_precision': summary['micro_precision'], 'micro_recall': summary['micro_recall']})
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    import argparse
+
+    from checkpoint import default_checkpoint_path
+
+    parser = argparse.ArgumentParser(description="Two-stage cascade tagging with a per-stage cost/accuracy report")
+    parser.add_argument('excel_file', help="Labelled sheet, e.g. test_data.xlsx")
+    parser.add_argument('output_file', help="Result sheet, e.g. results/test_data_cascade.xlsx")
+    parser.add_argument('images_dir', help="Directory containing the local images")
+    parser.add_argument('--model-id', default="us.amazon.nova-lite-v1:0", help="Second-stage model")
+    parser.add_argument('--stage1-model-id', default=DEFAULT_STAGE1_MODEL_ID)
+    parser.add_argument('--max-groups', type=int, default=DEFAULT_MAX_GROUPS)
+    parser.add_argument('--no-skip', action='store_true', help="Run the second stage even when no group applies")
+    parser.add_argument('--max-workers', type=int, default=4)
+    parser.add_argument('--region', default="us-west-2")
+    args = parser.parse_args()
+
+    process_excel_data_cascade(args.excel_file, args.output_file, args.images_dir,
+                               stage1_model_id=args.stage1_model_id, max_groups=args.max_groups,
+                               skip_no_group=not args.no_skip, model_id=args.model_id, region=args.region,
+                               max_workers=args.max_workers)
+    report = cascade_report(default_checkpoint_path(args.output_file), args.model_id)
+    report_file = args.output_file.rsplit('.', 1)[0] + '_cascade_report.csv'
+    report.to_csv(report_file, index=False)
+    print(report.to_string(index=False))
+    print(f"Saved to {report_file}")
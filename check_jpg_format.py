@@ -1,20 +1,18 @@
 #!/usr/bin/env python3
-import os
-from PIL import Image
+import pandas as pd
+
+from audit_images import audit_images
 
 def check_jpg_format_mismatch(imgs_dir="imgs"):
+    manifest = audit_images(imgs_dir, extensions=('.jpg',), compute_sha256=False)
     mismatched = []
-    
-    for filename in os.listdir(imgs_dir):
-        if filename.lower().endswith('.jpg'):
-            filepath = os.path.join(imgs_dir, filename)
-            try:
-                with Image.open(filepath) as img:
-                    if img.format != 'JPEG':
-                        mismatched.append((filename, img.format))
-            except Exception as e:
-                mismatched.append((filename, f"Error: {e}"))
-    
+    for row in manifest.itertuples():
+        if row.format == 'JPEG':
+            continue
+        if pd.isna(row.format):
+            mismatched.append((row.filename, f"Error: {row.error}"))
+        else:
+            mismatched.append((row.filename, row.format))
     return mismatched
 
 if __name__ == "__main__":
@@ -1,34 +1,23 @@
 #!/usr/bin/env python3
-import os
-from PIL import Image
+from audit_images import audit_images
 
 img_dir = "imgs"
-large_files = []
-all_images = []
 
-for filename in os.listdir(img_dir):
-    filepath = os.path.join(img_dir, filename)
-    if os.path.isfile(filepath) and filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-        size_mb = os.path.getsize(filepath) / (1024 * 1024)
-        
-        try:
-            with Image.open(filepath) as img:
-                width, height = img.size
-                pixels = width * height
-                all_images.append((filename, width, height, pixels, size_mb))
-                
-                if size_mb > 1:
-                    large_files.append((filename, f"{size_mb:.2f}MB"))
-        except:
-            continue
+if __name__ == "__main__":
+    # Header-only audit in a process pool; hashing is not needed here
+    manifest = audit_images(img_dir, extensions=('.jpg', '.jpeg', '.png'), compute_sha256=False)
+    all_images = manifest[manifest['width'].notna()].copy()
+    all_images['size_mb'] = all_images['size_bytes'] / (1024 * 1024)
+    all_images['pixels'] = all_images['width'] * all_images['height']
+    large_files = all_images[all_images['size_mb'] > 1]
 
-# Sort by pixel count (dimensions)
-top_dimensions = sorted(all_images, key=lambda x: x[3], reverse=True)[:20]
+    # Sort by pixel count (dimensions)
+    top_dimensions = all_images.sort_values('pixels', ascending=False, kind='stable').head(20)
 
-print(f"Found {len(large_files)} images larger than 1MB:")
-for filename, size in large_files:
-    print(f"{filename}: {size}")
+    print(f"Found {len(large_files)} images larger than 1MB:")
+    for row in large_files.itertuples():
+        print(f"{row.filename}: {row.size_mb:.2f}MB")
 
-print(f"\nTop 20 images by dimensions:")
-for filename, width, height, pixels, size_mb in top_dimensions:
-    print(f"{filename}: {width}x{height} ({pixels:,} pixels, {size_mb:.2f}MB)")
+    print(f"\nTop 20 images by dimensions:")
+    for row in top_dimensions.itertuples():
+        print(f"{row.filename}: {row.width}x{row.height} ({row.pixels:,} pixels, {row.size_mb:.2f}MB)")
@@ -1,16 +1,15 @@
-import pandas as pd
 import boto3
 
+from input_reader import iter_rows
+
 account_id = "687752207838"
 s3_bucket = "687752207838-dify-files"
 s3_prefix = "shein_img_tagging/imgs"
 
 s3_client = boto3.client('s3')
 
-df = pd.read_excel('train_data_balanced.xlsx')
-
 with open('nova_sft_trainset.jsonl', 'w', encoding='utf-8') as f:
-    for idx, row in df.iterrows():
+    for row in iter_rows('train_data_balanced.xlsx'):
         filename = row['filename']
         s3_path = f"s3://{s3_bucket}/{s3_prefix}/{filename}"
         
@@ -0,0 +1,123 @@
+import json
+import os
+
+import pandas as pd
+
+# Columns of the final result sheet, in order
+RESULT_COLUMNS = ['tag_gt', 'image_path', 'inference_result']
+# Bytes read at a time when looking for the last complete line
+_TAIL_CHUNK_SIZE = 4096
+
+def default_checkpoint_path(output_file):
+    """Checkpoint file next to the output sheet, e.g. result.xlsx -> result.checkpoint.jsonl"""
+    return os.path.splitext(output_file)[0] + '.checkpoint.jsonl'
+
+def row_key(row_index, image_path):
+    """Identity of an input row in the checkpoint."""
+    return f"{row_index}:{image_path}"
+
+def truncate_partial_line(path):
+    """
+    Cut a trailing line left unfinished by a crash, so records appended on resume start
+    on a line of their own. Returns the number of bytes removed.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - _TAIL_CHUNK_SIZE)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b'\n')
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            f.truncate(position)
+        return end - position
+
+class CheckpointWriter:
+    """
+    Append-only JSONL checkpoint. One line is written and flushed per finished row,
+    so a crash loses at most the rows that were still in flight.
+    """
+
+    def __init__(self, path, resume=False):
+        """
+        Args:
+            path: JSONL checkpoint file
+            resume: Append to an existing checkpoint instead of starting a new one
+                    (after dropping a last line cut off by a crash)
+        """
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if resume:
+            truncate_partial_line(path)
+        self.file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def iter_checkpoint(path):
+    """
+    Yield the records of a checkpoint file. When a row was written more than once
+    (e.g. retried after a resume) every occurrence is yielded, in file order.
+    A trailing line cut off by a crash is skipped.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+def load_done_keys(path, retry_failed=True):
+    """
+    Keys of the rows a resumed run can skip.
+
+    Args:
+        path: JSONL checkpoint file
+        retry_failed: If True, rows whose last attempt failed are not considered done
+
+    Returns:
+        set: Row keys (see row_key)
+    """
+    done = set()
+    for record in iter_checkpoint(path):
+        key = row_key(record['row_index'], record['image_path'])
+        if record.get('error') and retry_failed:
+            done.discard(key)
+        else:
+            done.add(key)
+    return done
+
+def checkpoint_to_dataframe(path):
+    """Latest record per row, in input order, with the result sheet columns."""
+    latest = {}
+    for record in iter_checkpoint(path):
+        latest[row_key(record['row_index'], record['image_path'])] = record
+    records = sorted(latest.values(), key=lambda record: record['row_index'])
+    return pd.DataFrame(records, columns=['row_index'] + RESULT_COLUMNS)[RESULT_COLUMNS]
+
+def checkpoint_to_excel(path, output_file):
+    """Convert a checkpoint into the result sheet produced by process_excel_data."""
+    result_df = checkpoint_to_dataframe(path)
+    result_df.to_excel(output_file, index=False)
+    return result_df
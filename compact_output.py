@@ -0,0 +1,87 @@
+import math
+from functools import lru_cache
+
+from label_index import NO_MATCH_LABEL
+from prompt_registry import CATEGORY_TABLE, DEFAULT_PROMPT_VERSION, get_categories
+
+# The assistant prefill opens a ```json block; stopping at its closing fence ends the
+# answer right after the JSON object instead of letting the model add trailing text
+STOP_SEQUENCES = ['```']
+MAX_LABELS = 5
+# Answer wrapper around the labels, as the model writes it after the prefill
+ANSWER_TEMPLATE = '\n{{"result":"{}"}}\n'
+# Conservative token estimate: one token per CJK/full-width character and one per two
+# other characters, plus a margin, so the cap never cuts off a valid answer
+CHARS_PER_OTHER_TOKEN = 2
+TOKEN_MARGIN = 1.2
+MIN_MAX_TOKENS = 16
+
+LABEL_ID_INSTRUCTION = (
+    "\n\n**OUTPUT FORMAT**\n"
+    "- Output the category NUMBERS from ##REFERENCE_CATEGORIES## instead of the OUTPUT_LABEL values, "
+    "e.g. {\"result\":\"12,45\"}\n"
+    "- If absolutely no categories match, return {\"result\":\"0\"}"
+)
+# Category number the model returns in label-ID mode when nothing matches
+NO_MATCH_ID = '0'
+
+def estimate_output_tokens(text):
+    """Upper estimate of the number of output tokens of a short answer."""
+    wide = sum(1 for char in text if ord(char) > 0x2E7F)
+    other = len(text) - wide
+    return math.ceil((wide + math.ceil(other / CHARS_PER_OTHER_TOKEN)) * TOKEN_MARGIN)
+
+@lru_cache(maxsize=32)
+def compact_max_tokens(version=DEFAULT_PROMPT_VERSION, label_ids=False, max_labels=MAX_LABELS):
+    """
+    maxTokens for the longest possible answer of a prompt version: the max_labels
+    longest labels (or category numbers) of its category table. Versions without
+    numbered categories fall back to the names in categories_cn.txt.
+    """
+    categories = get_categories(version)
+    if label_ids:
+        values = [str(category.number) for category in categories] or [NO_MATCH_ID]
+    elif categories:
+        values = [category.label for category in categories] + [NO_MATCH_LABEL]
+    else:
+        values = [entry['name'] for entry in CATEGORY_TABLE] + [NO_MATCH_LABEL]
+    longest = sorted(values, key=estimate_output_tokens, reverse=True)[:max_labels]
+    return max(MIN_MAX_TOKENS, estimate_output_tokens(ANSWER_TEMPLATE.format(','.join(longest))))
+
+def build_inference_config(compact=False, label_ids=False, version=DEFAULT_PROMPT_VERSION):
+    """
+    Inference config of img_tagging. The compact mode adds the stop sequence and caps
+    maxTokens at the longest possible answer.
+    """
+    inference_config = {
+        'maxTokens': 150,
+        'topP': 0.01,
+        'temperature': 0
+    }
+    if compact:
+        inference_config['maxTokens'] = compact_max_tokens(version, label_ids)
+        inference_config['stopSequences'] = STOP_SEQUENCES
+    return inference_config
+
+@lru_cache(maxsize=8)
+def _labels_by_id(version):
+    return {str(category.number): category.label for category in get_categories(version)}
+
+def labels_from_ids(result, version=DEFAULT_PROMPT_VERSION):
+    """
+    Map a comma-separated list of category numbers back to OUTPUT_LABELs.
+
+    Pieces that are not category numbers are kept as they are, so they show up as
+    out-of-vocabulary labels downstream.
+    """
+    labels_by_id = _labels_by_id(version)
+    labels = []
+    for piece in result.replace('，', ',').split(','):
+        piece = piece.strip()
+        if not piece:
+            continue
+        if piece == NO_MATCH_ID:
+            labels.append(NO_MATCH_LABEL)
+        else:
+            labels.append(labels_by_id.get(piece, piece))
+    return ','.join(labels)
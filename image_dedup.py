@@ -0,0 +1,246 @@
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_HASH_CACHE_PATH = 'cache/image_hashes.sqlite'
+# Maximum Hamming distance (of 64 bits) between near-duplicates, for pHash and dHash alike
+DEFAULT_MAX_DISTANCE = 6
+HASH_SIZE = 8
+PHASH_IMAGE_SIZE = 32
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+def _bits_to_int(bits):
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+@lru_cache(maxsize=4)
+def _dct_matrix(n):
+    # Orthonormal DCT-II basis, so a 2-D DCT is two matrix products (no SciPy needed)
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+def dhash(gray):
+    """Difference hash: sign of horizontal gradients of a 9x8 grayscale thumbnail."""
+    pixels = np.asarray(gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+def phash(gray):
+    """Perceptual hash: low-frequency DCT coefficients of a 32x32 thumbnail against their median."""
+    pixels = np.asarray(gray.resize((PHASH_IMAGE_SIZE, PHASH_IMAGE_SIZE), Image.LANCZOS), dtype=np.float64)
+    dct = _dct_matrix(PHASH_IMAGE_SIZE)
+    low = (dct @ pixels @ dct.T)[:HASH_SIZE, :HASH_SIZE]
+    # The DC term only reflects overall brightness
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+def compute_hashes(image_path):
+    """
+    (pHash, dHash) of an image file as 64-bit ints, or None if PIL cannot decode it
+    (HTML pages, corrupt files, formats without a PIL plugin).
+    """
+    try:
+        with Image.open(image_path) as img:
+            # JPEG can decode straight to a small grayscale draft, much cheaper than a full decode
+            img.draft('L', (PHASH_IMAGE_SIZE * 2, PHASH_IMAGE_SIZE * 2))
+            gray = img.convert('L')
+    except Exception:
+        return None
+    return phash(gray), dhash(gray)
+
+class HashCache:
+    """
+    On-disk cache of perceptual hashes keyed by file path, size and modification time,
+    so unchanged images are never decoded twice. Safe to share between threads.
+    """
+
+    def __init__(self, path=DEFAULT_HASH_CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        # Hashes are stored as hex text: SQLite integers are signed 64-bit
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                phash TEXT,
+                dhash TEXT
+            )
+        ''')
+        self.conn.commit()
+
+    def get_hashes(self, image_path):
+        """Cached or freshly computed (pHash, dHash) of a file, None if it cannot be decoded."""
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        path = os.path.abspath(image_path)
+        with self.lock:
+            row = self.conn.execute('SELECT size, mtime_ns, phash, dhash FROM hashes WHERE path = ?',
+                                    (path,)).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return (int(row[2], 16), int(row[3], 16)) if row[2] is not None else None
+
+        hashes = compute_hashes(image_path)
+        values = (f"{hashes[0]:016x}", f"{hashes[1]:016x}") if hashes else (None, None)
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)',
+                              (path, stat.st_size, stat.st_mtime_ns, *values))
+            self.conn.commit()
+        return hashes
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes for Hamming-radius queries."""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        node = [value, item, {}]
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            distance = hamming(value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, value, radius):
+        """All (distance, item) within radius of value, nearest first."""
+        if self.root is None:
+            return []
+        matches = []
+        stack = [self.root]
+        while stack:
+            node_value, item, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= radius:
+                matches.append((distance, item))
+            # Triangle inequality: only children at distance d with |d - distance| <= radius can match
+            for child_distance, child in children.items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return sorted(matches, key=lambda match: match[0])
+
+class DuplicateFinder:
+    """
+    Online near-duplicate detection by leader clustering: each image is compared with
+    the cluster representatives seen so far and either joins the nearest one or becomes
+    a new representative. Clusters therefore never chain, and the first image of a
+    cluster in input order is its representative.
+
+    Two images are near-duplicates when both their pHash and dHash are within
+    max_distance. Identical paths are always duplicates; images that cannot be hashed
+    are always their own representative.
+    """
+
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE, hash_cache=None):
+        """
+        Args:
+            max_distance: Maximum Hamming distance of both hashes
+            hash_cache: HashCache or path of its SQLite file (optional, hashes are
+                        then only kept in memory)
+        """
+        self.max_distance = max_distance
+        if isinstance(hash_cache, str):
+            hash_cache = HashCache(hash_cache)
+        self.hash_cache = hash_cache
+        self.tree = BKTree()
+        self.representatives = {}
+        self.duplicates = 0
+
+    def _hashes(self, image_path):
+        if self.hash_cache is not None:
+            return self.hash_cache.get_hashes(image_path)
+        return compute_hashes(image_path)
+
+    def representative(self, image_path):
+        """
+        Register an image and return the path of the earlier representative it duplicates,
+        or None if it is a new representative.
+        """
+        if image_path in self.representatives:
+            self.duplicates += 1
+            return image_path
+        hashes = self._hashes(image_path)
+        if hashes is None:
+            return None
+        phash_value, dhash_value = hashes
+        for _, (path, other_dhash) in self.tree.search(phash_value, self.max_distance):
+            # Forgotten representatives stay in the tree but no longer match
+            if path in self.representatives and hamming(dhash_value, other_dhash) <= self.max_distance:
+                self.duplicates += 1
+                return path
+        self.tree.add(phash_value, (image_path, dhash_value))
+        self.representatives[image_path] = hashes
+        return None
+
+    def forget(self, image_path):
+        """Stop matching images against a representative, e.g. because its request failed."""
+        self.representatives.pop(image_path, None)
+
+    def close(self):
+        if self.hash_cache is not None:
+            self.hash_cache.close()
+
+def find_duplicates(image_paths, max_distance=DEFAULT_MAX_DISTANCE, hash_cache=None):
+    """
+    Group images into near-duplicate clusters.
+
+    Returns:
+        dict: image path -> representative path (representatives map to themselves)
+    """
+    finder = DuplicateFinder(max_distance, hash_cache)
+    clusters = {}
+    for image_path in image_paths:
+        clusters[image_path] = finder.representative(image_path) or image_path
+    finder.close()
+    return clusters
+
+if __name__ == "__main__":
+    import argparse
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Find near-duplicate images with pHash/dHash")
+    parser.add_argument('images_dir', help="Directory containing the images")
+    parser.add_argument('--max-distance', type=int, default=DEFAULT_MAX_DISTANCE)
+    parser.add_argument('--hash-cache', default=DEFAULT_HASH_CACHE_PATH)
+    parser.add_argument('--output', default='results/duplicates.csv')
+    args = parser.parse_args()
+
+    paths = sorted(entry.path for entry in os.scandir(args.images_dir) if entry.is_file())
+    clusters = find_duplicates(paths, args.max_distance, args.hash_cache)
+    df = pd.DataFrame({'image_path': list(clusters), 'representative': list(clusters.values())})
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    df.to_csv(args.output, index=False)
+
+    duplicates = int((df['image_path'] != df['representative']).sum())
+    print(f"📊 {len(df)} images, {df['representative'].nunique()} clusters, "
+          f"{duplicates} near-duplicates ({duplicates / max(1, len(df)):.1%})")
+    print(f"Saved to {args.output}")
@@ -0,0 +1,204 @@
+import base64
+from io import BytesIO
+
+import requests
+from PIL import Image
+
+# Bytes of the file header the format signatures are matched against
+HEADER_BYTES = 16
+
+def read_image_file(image_path):
+    """
+    Read a whole image file with a single open and read. The bytes are used as they are
+    for the payload, so no further copy is made of them.
+    """
+    with open(image_path, "rb") as f:
+        return f.read()
+
+def sniff_image_format(data, image_path='<bytes>', pil_source=None):
+    """
+    Detect the actual image format from an in-memory buffer and return format info.
+    
+    Args:
+        data: Buffer holding the whole file, or at least its first HEADER_BYTES bytes
+              when pil_source is given
+        image_path: Name used in error messages
+        pil_source: What PIL opens when no signature matches (default: the buffer itself)
+    
+    Returns:
+        tuple: (Bedrock format, needs_conversion)
+    """
+    header = bytes(data[:HEADER_BYTES])  # Read more bytes for better detection
+    
+    # Check for HTML files (common issue)
+    if header.startswith(b'<!DOCTYPE') or header.startswith(b'<html'):
+        raise Exception(f"File appears to be HTML, not an image: {image_path}")
+    
+    # Check file signatures
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg', False  # format, needs_conversion
+    elif header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png', False
+    elif header.startswith(b'GIF87a') or header.startswith(b'GIF89a'):
+        return 'gif', False
+    elif header.startswith(b'RIFF') and header[8:12] == b'WEBP':
+        return 'webp', False
+    elif len(header) >= 12 and header[4:12] == b'ftypavif':
+        return 'jpeg', True  # Convert AVIF to JPEG
+    
+    # Check if it might be a text file
+    header_str = header.decode('utf-8', errors='ignore')
+    if any(html_tag in header_str.lower() for html_tag in ['<html', '<!doctype', '<head', '<body']):
+        raise Exception(f"File appears to be HTML/text, not an image: {image_path}")
+    
+    # Try to open with PIL. Image.open only parses the header, no pixels are decoded here.
+    try:
+        with Image.open(pil_source if pil_source is not None else BytesIO(data)):
+            # If PIL can open it, convert to JPEG for safety
+            return 'jpeg', True
+    except Exception:
+        raise Exception(f"Unsupported or corrupted image file: {image_path}")
+
+def detect_image_format(image_path):
+    """Detect the actual image format from file content and return format info."""
+    with open(image_path, "rb") as f:
+        header = f.read(HEADER_BYTES)
+    # PIL opens the file itself only when no signature matches
+    return sniff_image_format(header, image_path, pil_source=image_path)
+
+def to_rgb(img):
+    """Convert a PIL image to RGB, flattening transparency onto a white background."""
+    # Convert to RGB if necessary (for formats like PNG with transparency)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        # Create white background for transparent images
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        return background
+    elif img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+def convert_to_jpeg_bytes(image_source):
+    """
+    Convert any image format to JPEG bytes.
+    
+    Args:
+        image_source: Image file path, or bytes already holding the file
+    """
+    if not isinstance(image_source, str):
+        image_source = BytesIO(image_source)
+    try:
+        with Image.open(image_source) as img:
+            img = to_rgb(img)
+            
+            # Save as JPEG to BytesIO
+            jpeg_buffer = BytesIO()
+            img.save(jpeg_buffer, format='JPEG', quality=95)
+            return jpeg_buffer.getvalue()
+    except Exception as e:
+        raise Exception(f"Failed to convert image to JPEG: {str(e)}")
+
+def download_image(image_url):
+    """
+    Download an image from URL.
+    
+    Returns:
+        tuple: (raw bytes, content-type header)
+    """
+    try:
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        response = requests.get(image_url, timeout=30, headers=headers)
+        response.raise_for_status()
+        return response.content, response.headers.get('content-type', '')
+    except Exception as e:
+        raise Exception(f"Failed to download image from URL: {str(e)}")
+
+def format_from_content_type(content_type, image_url=''):
+    """Determine the Bedrock image format from content-type or URL extension."""
+    content_type = content_type.lower()
+    image_url = image_url.lower()
+    if 'png' in content_type or image_url.endswith('.png'):
+        return 'png'
+    elif 'gif' in content_type or image_url.endswith('.gif'):
+        return 'gif'
+    elif 'webp' in content_type or image_url.endswith('.webp'):
+        return 'webp'
+    # Default to jpeg for most cases
+    return 'jpeg'
+
+def load_local_image(image_path, derived_cache=None):
+    """
+    Read a local image as raw bytes ready for the Converse API, converting to JPEG if needed.
+    
+    Args:
+        image_path: Local image file
+        derived_cache: transcode.DerivedImageCache holding converted JPEGs (optional).
+                       Images that need conversion are then converted once and read back
+                       from the cache on later runs.
+    
+    Returns:
+        tuple: (image bytes, Bedrock format)
+    """
+    try:
+        # Read the file once; sniffing, PIL decoding and the payload all use this buffer
+        return prepare_local_image(read_image_file(image_path), image_path, derived_cache)
+    except Exception as e:
+        raise Exception(f"Failed to process image file: {str(e)}")
+
+def prepare_local_image(data, image_path='<bytes>', derived_cache=None):
+    """
+    Turn the buffer of a local image file into bytes ready for the Converse API: the
+    CPU-bound half of load_local_image, after the file has been read.
+    
+    Returns:
+        tuple: (image bytes, Bedrock format)
+    """
+    # Detect actual format from content
+    actual_format, needs_conversion = sniff_image_format(data, image_path)
+    
+    if needs_conversion:
+        if derived_cache is not None:
+            return derived_cache.jpeg_bytes(data), actual_format
+        print(f"🔄 Converting {image_path} to JPEG format...")
+        return convert_to_jpeg_bytes(data), actual_format
+    
+    return data, actual_format
+
+def load_image(image_input, derived_cache=None, url_fetcher=None):
+    """
+    Load an image from a local file path or URL as raw bytes, with no intermediate encoding.
+    
+    Args:
+        image_input: Either a local file path or URL to the image
+        derived_cache: transcode.DerivedImageCache for local images that need conversion (optional)
+        url_fetcher: url_fetcher.UrlFetcher to download URLs through its pooled session
+                     and blob cache (optional, a plain download otherwise)
+    
+    Returns:
+        tuple: (image bytes, Bedrock format - one of jpeg/png/gif/webp)
+    """
+    if image_input.startswith(('http://', 'https://')):
+        if url_fetcher is not None:
+            image_bytes, content_type = url_fetcher.fetch(image_input)
+        else:
+            image_bytes, content_type = download_image(image_input)
+        return image_bytes, format_from_content_type(content_type, image_input)
+    return load_local_image(image_input, derived_cache)
+
+def encode_image_to_base64(image_path, convert_to_jpeg=False):
+    """Encode an image file to base64 string. Only for callers that need text payloads."""
+    if convert_to_jpeg:
+        jpeg_bytes = convert_to_jpeg_bytes(image_path)
+        return base64.b64encode(jpeg_bytes).decode('utf-8')
+    else:
+        with open(image_path, "rb") as image_file:
+            return base64.b64encode(image_file.read()).decode('utf-8')
+
+def encode_image_from_url(image_url):
+    """Download and encode an image from URL to base64 string. Only for callers that need text payloads."""
+    image_bytes, content_type = download_image(image_url)
+    return base64.b64encode(image_bytes).decode('utf-8'), content_type
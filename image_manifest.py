@@ -0,0 +1,286 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from audit_images import DEFAULT_CHUNKSIZE, MANIFEST_COLUMNS, probe_image
+from input_reader import iter_rows as iter_input_rows
+from label_metrics import split_labels
+
+DEFAULT_MANIFEST_DB_PATH = 'cache/image_manifest.sqlite'
+
+_BOOL_COLUMNS = ('is_html', 'is_corrupt', 'extension_mismatch')
+
+def _probe(args):
+    return probe_image(*args)
+
+def _subdirectory_condition(images_dir):
+    # substr instead of LIKE, whose wildcards (_ and %) can appear in file names
+    prefix = os.path.join(images_dir, '')
+    return '(directory = ? OR substr(directory, 1, ?) = ?)', [images_dir, len(prefix), prefix]
+
+class ImageManifest:
+    """
+    Persistent image manifest in SQLite, keyed by absolute path.
+
+    refresh() stats every file of a directory and only re-probes files that are new or
+    whose mtime, size or inode changed, so re-runs over a large unchanged directory cost
+    one scandir. Rows hold the audit_images columns and can be queried without touching
+    the files. Safe to share between threads.
+    """
+
+    def __init__(self, path=DEFAULT_MANIFEST_DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS images (
+                path TEXT PRIMARY KEY,
+                directory TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                extension TEXT,
+                size_bytes INTEGER,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                format TEXT,
+                width INTEGER,
+                height INTEGER,
+                mode TEXT,
+                sha256 TEXT,
+                is_html INTEGER NOT NULL,
+                is_corrupt INTEGER NOT NULL,
+                extension_mismatch INTEGER NOT NULL,
+                error TEXT,
+                probed_at REAL NOT NULL
+            )
+        ''')
+        # Ground-truth labels of an image, one row per label, for label queries
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS labels (
+                path TEXT NOT NULL,
+                label TEXT NOT NULL,
+                PRIMARY KEY (path, label)
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS images_directory ON images (directory)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS images_format ON images (format, size_bytes)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS labels_label ON labels (label)')
+        self.conn.commit()
+
+    def _stored_stats(self, directory):
+        with self.lock:
+            rows = self.conn.execute('SELECT path, size_bytes, mtime_ns, inode FROM images WHERE directory = ?',
+                                     (directory,)).fetchall()
+        return {path: (size, mtime_ns, inode) for path, size, mtime_ns, inode in rows}
+
+    def _scan(self, directory, recursive):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        yield from self._scan(entry.path, recursive)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    yield directory, entry.path, (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+    def refresh(self, images_dir, recursive=False, max_workers=None, compute_sha256=True,
+                chunksize=DEFAULT_CHUNKSIZE):
+        """
+        Bring the manifest of images_dir up to date.
+
+        Args:
+            images_dir: Directory to scan
+            recursive: Also scan subdirectories
+            max_workers: Worker processes for probing changed files (default: one per CPU)
+            compute_sha256: Hash the contents of changed files (default: True)
+            chunksize: Files sent to a worker at a time
+
+        Returns:
+            dict: Counts of new, changed, unchanged and removed files
+        """
+        images_dir = os.path.abspath(images_dir)
+        stored = self._stored_stats(images_dir)
+        changed = []
+        stats = {}
+        counts = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+        seen_directories = {images_dir}
+        for directory, path, stat in self._scan(images_dir, recursive):
+            if directory not in seen_directories:
+                seen_directories.add(directory)
+                stored.update(self._stored_stats(directory))
+            previous = stored.pop(path, None)
+            if previous == stat:
+                counts['unchanged'] += 1
+                continue
+            counts['new' if previous is None else 'changed'] += 1
+            changed.append((path, stat[0], compute_sha256))
+            stats[path] = (directory, stat)
+
+        if len(changed) <= chunksize or max_workers == 1:
+            self._store(map(_probe, changed), stats)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                self._store(executor.map(_probe, changed, chunksize=chunksize), stats)
+
+        # Files still left in stored were deleted, along with those of vanished subdirectories
+        removed = list(stored)
+        if recursive:
+            condition, params = _subdirectory_condition(images_dir)
+            with self.lock:
+                rows = self.conn.execute(f'SELECT path, directory FROM images WHERE {condition}', params).fetchall()
+            removed.extend(path for path, directory in rows if directory not in seen_directories)
+        counts['removed'] = len(removed)
+        with self.lock:
+            self.conn.executemany('DELETE FROM images WHERE path = ?', [(path,) for path in removed])
+            self.conn.commit()
+        return counts
+
+    def _store(self, records, stats, batch_size=1000):
+        batch = []
+        probed_at = time.time()
+        for record in records:
+            directory, (_, mtime_ns, inode) = stats[record['path']]
+            batch.append((record['path'], directory, record['filename'], record['extension'], record['size_bytes'],
+                          mtime_ns, inode, record['format'], record['width'], record['height'], record['mode'],
+                          record['sha256'], int(record['is_html']), int(record['is_corrupt']),
+                          int(record['extension_mismatch']), record['error'], probed_at))
+            if len(batch) >= batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch):
+        with self.lock:
+            self.conn.executemany(f"INSERT OR REPLACE INTO images VALUES ({', '.join('?' * 17)})", batch)
+            self.conn.commit()
+
+    def get(self, image_path):
+        """
+        Manifest row of a file if it is unchanged since it was probed (one stat, no read),
+        otherwise None.
+        """
+        path = os.path.abspath(image_path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self.lock:
+            cursor = self.conn.execute('SELECT * FROM images WHERE path = ?', (path,))
+            row = cursor.fetchone()
+            columns = [description[0] for description in cursor.description]
+        if row is None:
+            return None
+        record = dict(zip(columns, row))
+        if (record['size_bytes'], record['mtime_ns'], record['inode']) != (stat.st_size, stat.st_mtime_ns,
+                                                                          stat.st_ino):
+            return None
+        for column in _BOOL_COLUMNS:
+            record[column] = bool(record[column])
+        return record
+
+    def import_labels(self, excel_file, images_dir, label_column='tag_gt', image_column='image'):
+        """Attach the ground-truth labels of a labelled sheet to the images it names."""
+        images_dir = os.path.abspath(images_dir)
+        rows = []
+        for row in iter_input_rows(excel_file):
+            if not row.get(image_column) or row.get(label_column) is None:
+                continue
+            path = os.path.join(images_dir, str(row[image_column]))
+            rows.extend((path, label) for label in split_labels(str(row[label_column])))
+        with self.lock:
+            self.conn.executemany('INSERT OR IGNORE INTO labels VALUES (?, ?)', rows)
+            self.conn.commit()
+        return len(rows)
+
+    def query(self, images_dir=None, formats=None, max_bytes=None, max_long_edge=None, label=None,
+              valid_only=True, recursive=True):
+        """
+        Select manifest rows without touching the files, e.g. all valid JPEGs under 5MB
+        with a given label: query(formats=['JPEG'], max_bytes=5 * 1024 * 1024, label='刀具').
+
+        Args:
+            images_dir: Only files under this directory (default: all)
+            formats: PIL format names to keep, e.g. ['JPEG', 'PNG']
+            max_bytes: Maximum file size
+            max_long_edge: Maximum of width and height in pixels
+            label: Only images with this ground-truth label (see import_labels)
+            valid_only: Drop HTML and corrupt files (default: True)
+            recursive: With images_dir, include its subdirectories (default: True)
+
+        Returns:
+            pd.DataFrame: Matching rows with the audit_images manifest columns, ordered by path
+        """
+        conditions = []
+        params = []
+        if images_dir is not None:
+            images_dir = os.path.abspath(images_dir)
+            if recursive:
+                condition, condition_params = _subdirectory_condition(images_dir)
+                conditions.append(condition)
+                params.extend(condition_params)
+            else:
+                conditions.append('directory = ?')
+                params.append(images_dir)
+        if formats:
+            conditions.append(f"format IN ({', '.join('?' * len(formats))})")
+            params.extend(formats)
+        if max_bytes is not None:
+            conditions.append('size_bytes <= ?')
+            params.append(max_bytes)
+        if max_long_edge is not None:
+            conditions.append('MAX(width, height) <= ?')
+            params.append(max_long_edge)
+        if label is not None:
+            conditions.append('path IN (SELECT path FROM labels WHERE label = ?)')
+            params.append(label)
+        if valid_only:
+            conditions.append('is_html = 0 AND is_corrupt = 0')
+
+        sql = f"SELECT {', '.join(MANIFEST_COLUMNS)} FROM images"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        with self.lock:
+            df = pd.read_sql_query(sql + ' ORDER BY path', self.conn, params=params)
+        for column in _BOOL_COLUMNS:
+            df[column] = df[column].astype(bool)
+        return df.astype({'size_bytes': 'Int64', 'width': 'Int64', 'height': 'Int64'})
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+if __name__ == "__main__":
+    import argparse
+
+    from audit_images import print_audit_summary, save_manifest
+
+    parser = argparse.ArgumentParser(description="Incrementally refresh the SQLite image manifest")
+    parser.add_argument('images_dir', nargs='?', default='imgs')
+    parser.add_argument('--db', default=DEFAULT_MANIFEST_DB_PATH)
+    parser.add_argument('--recursive', action='store_true')
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--no-sha256', action='store_true', help="Skip content hashing of changed files")
+    parser.add_argument('--labels', help="Labelled sheet (tag_gt + image columns) to attach labels from")
+    parser.add_argument('--export', help="Also write the directory's manifest to this .parquet or .csv file")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    manifest = ImageManifest(args.db)
+    counts = manifest.refresh(args.images_dir, args.recursive, args.workers, not args.no_sha256)
+    print(f"🔁 {counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged, "
+          f"{counts['removed']} removed ({time.time() - start_time:.1f}s)")
+    if args.labels:
+        print(f"🏷️  {manifest.import_labels(args.labels, args.images_dir)} labels attached")
+    df = manifest.query(args.images_dir, valid_only=False, recursive=args.recursive)
+    print_audit_summary(df)
+    if args.export:
+        save_manifest(df, args.export)
+        print(f"Saved to {args.export}")
+    manifest.close()
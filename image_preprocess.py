@@ -0,0 +1,86 @@
+from io import BytesIO
+
+from PIL import Image
+
+from image_loader import to_rgb
+
+# JPEG qualities tried in order until the encoded image fits the byte budget
+JPEG_QUALITY_STEPS = (90, 85, 75, 65)
+
+def _fit_size(width, height, max_long_edge):
+    """Scale (width, height) so that the long edge is at most max_long_edge."""
+    long_edge = max(width, height)
+    if not max_long_edge or long_edge <= max_long_edge:
+        return width, height
+    scale = max_long_edge / long_edge
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def _encode_jpeg(img, max_bytes):
+    """Encode as JPEG, lowering quality until it fits max_bytes. Returns the smallest attempt."""
+    jpeg_bytes = None
+    for quality in JPEG_QUALITY_STEPS:
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG', quality=quality)
+        jpeg_bytes = buffer.getvalue()
+        if not max_bytes or len(jpeg_bytes) <= max_bytes:
+            break
+    return jpeg_bytes
+
+def downscale_image(image_bytes, image_format, max_long_edge=None, max_bytes=None):
+    """
+    Downscale an image so its long edge and encoded size stay within budget.
+
+    Images already within both limits are returned untouched. Otherwise the image
+    is decoded at reduced size - JPEGs use PIL draft() so the DCT decoder skips
+    most of the pixels, other formats use the integer reduce() box filter before
+    the final resize - and re-encoded as JPEG, lowering quality and then size
+    until it fits max_bytes.
+
+    Args:
+        image_bytes: Raw image bytes
+        image_format: Bedrock format of image_bytes (jpeg/png/gif/webp)
+        max_long_edge: Maximum width or height in pixels (optional)
+        max_bytes: Target encoded size in bytes (optional)
+
+    Returns:
+        tuple: (image bytes, Bedrock format, info) where info records the original and
+               sent dimensions and sizes
+    """
+    with Image.open(BytesIO(image_bytes)) as img:
+        original_width, original_height = img.size
+        info = {
+            'original_width': original_width,
+            'original_height': original_height,
+            'original_bytes': len(image_bytes),
+            'width': original_width,
+            'height': original_height,
+            'bytes': len(image_bytes),
+            'downscaled': False
+        }
+
+        target_width, target_height = _fit_size(original_width, original_height, max_long_edge)
+        within_edge = (target_width, target_height) == (original_width, original_height)
+        within_bytes = not max_bytes or len(image_bytes) <= max_bytes
+        if within_edge and within_bytes:
+            return image_bytes, image_format, info
+
+        if img.format == 'JPEG':
+            # Decode directly at 1/2, 1/4 or 1/8 scale, never below the target size
+            img.draft('RGB', (target_width, target_height))
+        img = to_rgb(img)
+
+        # Integer box-reduce first (cheap), then a high quality resize for the remainder
+        factor = min(img.width // target_width, img.height // target_height)
+        if factor >= 2:
+            img = img.reduce(factor)
+        if img.size != (target_width, target_height):
+            img = img.resize((target_width, target_height), Image.LANCZOS)
+
+        jpeg_bytes = _encode_jpeg(img, max_bytes)
+        # Still over budget at the lowest quality: keep shrinking the resolution
+        while max_bytes and len(jpeg_bytes) > max_bytes and min(img.size) > 64:
+            img = img.resize((max(1, int(img.width * 0.75)), max(1, int(img.height * 0.75))), Image.LANCZOS)
+            jpeg_bytes = _encode_jpeg(img, max_bytes)
+
+    info.update({'width': img.width, 'height': img.height, 'bytes': len(jpeg_bytes), 'downscaled': True})
+    return jpeg_bytes, 'jpeg', info
@@ -0,0 +1,91 @@
+import json
+import os
+
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 1000
+
+def _iter_xlsx_chunks(path, chunk_size, sheet_name=None):
+    # read_only mode streams the sheet XML instead of building the whole workbook in memory
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        chunk = []
+        for values in rows:
+            # Skip fully empty trailing rows, as pd.read_excel does
+            if all(value is None for value in values):
+                continue
+            chunk.append(dict(zip(columns, values)))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+def _iter_csv_chunks(path, chunk_size):
+    for frame in pd.read_csv(path, chunksize=chunk_size):
+        yield frame.to_dict('records')
+
+def _iter_parquet_chunks(path, chunk_size):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet input requires pyarrow: pip install pyarrow")
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        yield batch.to_pylist()
+
+def _iter_jsonl_chunks(path, chunk_size):
+    chunk = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            chunk.append(json.loads(line))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def iter_row_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, sheet_name=None):
+    """
+    Lazily read a table file in chunks of rows.
+
+    Supported formats, by extension: .xlsx/.xlsm (openpyxl read-only mode), .csv,
+    .parquet (pyarrow record batches) and .jsonl/.json (one object per line).
+
+    Args:
+        path: Input file
+        chunk_size: Maximum number of rows per chunk
+        sheet_name: Worksheet to read for Excel input (default: first sheet)
+
+    Yields:
+        list: Rows as dicts of column name -> value, in file order
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        yield from _iter_xlsx_chunks(path, chunk_size, sheet_name)
+    elif extension == '.csv':
+        yield from _iter_csv_chunks(path, chunk_size)
+    elif extension == '.parquet':
+        yield from _iter_parquet_chunks(path, chunk_size)
+    elif extension in ('.jsonl', '.json'):
+        yield from _iter_jsonl_chunks(path, chunk_size)
+    else:
+        raise ValueError(f"Unsupported input format: {path} (expected xlsx, csv, parquet or jsonl)")
+
+def iter_rows(path, chunk_size=DEFAULT_CHUNK_SIZE, sheet_name=None):
+    """Lazily yield the rows of a table file as dicts. See iter_row_chunks."""
+    for chunk in iter_row_chunks(path, chunk_size, sheet_name):
+        yield from chunk
@@ -0,0 +1,199 @@
+import re
+import unicodedata
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+from prompt_registry import CATEGORY_TABLE
+
+DEFAULT_FUZZY_THRESHOLD = 0.6
+# Answer of the prompts when no category matches
+NO_MATCH_LABEL = '无'
+# Predictions are split on commas, but a few labels contain one themselves
+MAX_LABEL_PIECES = 3
+
+LabelMatch = namedtuple('LabelMatch', ['label_id', 'label', 'match', 'score'])
+
+_WHITESPACE_RE = re.compile(r'\s+')
+# Everything but letters and digits (CJK characters count as letters)
+_PUNCTUATION_RE = re.compile(r'[\W_]+')
+# Separators used interchangeably inside labels, e.g. 警棍/甩棍 vs 警棍、甩棍
+_ALTERNATIVE_SEPARATORS = str.maketrans({'、': '/', '|': '/', '\\': '/'})
+
+@lru_cache(maxsize=1)
+def _traditional_to_simplified():
+    """OpenCC t2s converter, or None when opencc is not installed (optional dependency)."""
+    try:
+        import opencc
+    except ImportError:
+        return None
+    return opencc.OpenCC('t2s')
+
+def normalize_label(text):
+    """
+    Normalized form of a label for lookups.
+
+    NFKC folds full-width characters to half-width (，／（ -> ,/( ), alternative
+    separators become "/", whitespace is removed, Latin letters are lowercased and,
+    if opencc is installed, traditional characters are converted to simplified.
+    """
+    text = unicodedata.normalize('NFKC', str(text))
+    converter = _traditional_to_simplified()
+    if converter is not None:
+        text = converter.convert(text)
+    text = text.translate(_ALTERNATIVE_SEPARATORS)
+    return _WHITESPACE_RE.sub('', text).lower()
+
+def compact_label(normalized):
+    """Normalized label without any punctuation, the key of the fuzzy index."""
+    return _PUNCTUATION_RE.sub('', normalized)
+
+def _ngrams(text, n):
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+class LabelIndex:
+    """
+    Map model output labels to canonical label IDs.
+
+    Lookups try, in order: the exact label, its normalized form (see normalize_label),
+    its punctuation-free form and finally a character n-gram index scored by Dice
+    similarity. Every tier is a hash lookup built once; results are memoized, so a
+    repeated output costs a single dict access.
+    """
+
+    def __init__(self, labels, fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD, ngram_size=2):
+        """
+        Args:
+            labels: Canonical labels; a label's ID is its position in this list
+            fuzzy_threshold: Minimum Dice similarity of n-grams for a fuzzy match
+            ngram_size: Character n-gram size of the fuzzy index
+        """
+        self.labels = list(labels)
+        self.fuzzy_threshold = fuzzy_threshold
+        self.ngram_size = ngram_size
+
+        self._exact = {}
+        self._normalized = {}
+        self._compact = {}
+        self._ngram_postings = {}
+        self._ngram_counts = []
+        ambiguous = set()
+        for label_id, label in enumerate(self.labels):
+            self._exact.setdefault(label, label_id)
+            normalized = normalize_label(label)
+            self._normalized.setdefault(normalized, label_id)
+            compact = compact_label(normalized)
+            # A punctuation-free key shared by two labels is useless for matching
+            if self._compact.setdefault(compact, label_id) != label_id:
+                ambiguous.add(compact)
+            ngrams = _ngrams(compact, ngram_size)
+            self._ngram_counts.append(len(ngrams))
+            for gram in ngrams:
+                self._ngram_postings.setdefault(gram, []).append(label_id)
+        for compact in ambiguous:
+            del self._compact[compact]
+        self._memo = {}
+
+    @classmethod
+    def from_category_table(cls, table=CATEGORY_TABLE, **kwargs):
+        """
+        Index of the category names in categories_cn.txt (the v12 OUTPUT_LABELs), plus the
+        "无" answer the prompts ask for when no category matches.
+        """
+        return cls([entry['name'] for entry in table] + [NO_MATCH_LABEL], **kwargs)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, label):
+        return label in self._exact
+
+    def _fuzzy(self, compact):
+        ngrams = _ngrams(compact, self.ngram_size)
+        if not ngrams:
+            return None
+        overlaps = Counter()
+        for gram in ngrams:
+            overlaps.update(self._ngram_postings.get(gram, ()))
+        best = None
+        for label_id, overlap in overlaps.items():
+            score = 2 * overlap / (len(ngrams) + self._ngram_counts[label_id])
+            if best is None or score > best[1]:
+                best = (label_id, score)
+        if best is None or best[1] < self.fuzzy_threshold:
+            return None
+        return best
+
+    def _lookup(self, text, fuzzy):
+        label_id = self._exact.get(text)
+        if label_id is not None:
+            return LabelMatch(label_id, self.labels[label_id], 'exact', 1.0)
+        normalized = normalize_label(text)
+        label_id = self._normalized.get(normalized)
+        if label_id is not None:
+            return LabelMatch(label_id, self.labels[label_id], 'normalized', 1.0)
+        compact = compact_label(normalized)
+        label_id = self._compact.get(compact)
+        if label_id is not None:
+            return LabelMatch(label_id, self.labels[label_id], 'normalized', 1.0)
+        if fuzzy:
+            best = self._fuzzy(compact)
+            if best is not None:
+                return LabelMatch(best[0], self.labels[best[0]], 'fuzzy', best[1])
+        return None
+
+    def lookup(self, text, fuzzy=True):
+        """
+        Find the canonical label of a single output label.
+
+        Returns:
+            LabelMatch or None: (label_id, label, match type exact/normalized/fuzzy, score),
+                                or None if the text is out of vocabulary
+        """
+        key = (text, fuzzy)
+        if key not in self._memo:
+            self._memo[key] = self._lookup(text, fuzzy)
+        return self._memo[key]
+
+    def canonicalize(self, prediction, fuzzy=True):
+        """
+        Map a comma-separated prediction to canonical labels.
+
+        Full-width commas count as separators; adjacent pieces are rejoined when
+        together they form a label that contains a comma itself.
+
+        Returns:
+            tuple: (list of canonical labels in prediction order without duplicates,
+                    list of out-of-vocabulary pieces)
+        """
+        pieces = [piece.strip() for piece in unicodedata.normalize('NFKC', str(prediction)).split(',')]
+        pieces = [piece for piece in pieces if piece]
+        labels, oov = [], []
+        i = 0
+        while i < len(pieces):
+            match = None
+            # Longest run of pieces first, exact/normalized only; fuzzy on the single piece
+            for j in range(min(len(pieces), i + MAX_LABEL_PIECES), i + 1, -1):
+                match = self.lookup(','.join(pieces[i:j]), fuzzy=False)
+                if match is not None:
+                    break
+            else:
+                j = i + 1
+                match = self.lookup(pieces[i], fuzzy=fuzzy)
+            if match is None:
+                oov.append(pieces[i])
+            elif match.label not in labels:
+                labels.append(match.label)
+            i = j
+        return labels, oov
+
+    def label_ids(self, prediction, fuzzy=True):
+        """Canonical label IDs of a comma-separated prediction (out-of-vocabulary pieces dropped)."""
+        labels, _ = self.canonicalize(prediction, fuzzy)
+        return [self._exact[label] for label in labels]
+
+@lru_cache(maxsize=1)
+def get_label_index():
+    """Shared index of the category table, built on first use."""
+    return LabelIndex.from_category_table()
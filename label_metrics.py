@@ -0,0 +1,213 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Value used in rank matrices for labels that were not predicted
+NOT_RANKED = np.iinfo(np.int16).max
+# Labels of the summary rows appended to the per-label report
+AGGREGATE_LABELS = ('Micro', 'Macro', 'Weighted')
+
+def split_labels(value, sep=','):
+    """Split a comma-separated label string into a list of stripped, non-empty labels."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return []
+    return [label.strip() for label in str(value).split(sep) if label.strip()]
+
+def parse_label_column(values, label_index=None):
+    """
+    Split a column of comma-separated label strings, parsing each distinct value once.
+
+    Result columns repeat the same few strings over and over, so only the distinct
+    values go through Python string handling; rows refer to them by code.
+    With a label_index (see label_index.LabelIndex), labels are mapped to their canonical
+    names and out-of-vocabulary labels are kept as they are.
+
+    Returns:
+        tuple: (int array of row -> distinct value code, -1 for missing values;
+                list of label lists, one per distinct value)
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    if label_index is None:
+        return codes, [split_labels(value) for value in uniques]
+    label_lists = []
+    for value in uniques:
+        labels, oov = label_index.canonicalize(value)
+        label_lists.append(labels + oov)
+    return codes, label_lists
+
+def build_vocabulary(*label_lists):
+    """Sorted vocabulary of every label that appears in the given lists of label lists."""
+    return sorted({label for labels_per_value in label_lists for labels in labels_per_value for label in labels})
+
+def rank_matrix(parsed, vocabulary):
+    """
+    Position of each vocabulary label in each row's label list.
+
+    Args:
+        parsed: (codes, label lists) as returned by parse_label_column
+        vocabulary: Label vocabulary; labels outside it are ignored
+
+    Returns:
+        np.ndarray: int16 matrix of shape (rows, labels); 0 for the first (most confident)
+                    label, NOT_RANKED where the label is absent. A repeated label keeps its
+                    first position.
+    """
+    codes, label_lists = parsed
+    label_to_id = {label: i for i, label in enumerate(vocabulary)}
+    # One extra all-absent row, picked by the -1 code of missing values
+    distinct_ranks = np.full((len(label_lists) + 1, len(vocabulary)), NOT_RANKED, dtype=np.int16)
+    for value_code, labels in enumerate(label_lists):
+        for position, label in reversed(list(enumerate(labels))):
+            label_id = label_to_id.get(label)
+            if label_id is not None:
+                distinct_ranks[value_code, label_id] = position
+    return distinct_ranks[codes]
+
+def indicator_matrix(values, vocabulary):
+    """Boolean label-indicator matrix of shape (rows, labels) for a column of label strings."""
+    return rank_matrix(parse_label_column(values), vocabulary) != NOT_RANKED
+
+def pack_indicator(matrix):
+    """Bit-pack a boolean indicator matrix along the label axis (8 labels per byte)."""
+    return np.packbits(matrix, axis=1)
+
+def unpack_indicator(packed, num_labels):
+    return np.unpackbits(packed, axis=1, count=num_labels).astype(bool)
+
+def _count_rows(matrix):
+    # Summing the uint8 view is several times faster than np.count_nonzero along an axis
+    return matrix.view(np.uint8).sum(axis=-2, dtype=np.int64)
+
+def confusion_counts(gt_matrix, pred_matrix):
+    """
+    Per-label TP/FP/FN over the rows. Works on (rows, labels) matrices as well as on
+    stacked (resamples, rows, labels) arrays, reducing over the rows axis.
+    """
+    tp = _count_rows(gt_matrix & pred_matrix)
+    fp = _count_rows(pred_matrix) - tp
+    fn = _count_rows(gt_matrix) - tp
+    return tp, fp, fn
+
+def _safe_divide(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    return np.divide(numerator, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape),
+                     where=denominator > 0)
+
+def precision_recall_f1(tp, fp, fn):
+    precision = _safe_divide(tp, tp + fp)
+    recall = _safe_divide(tp, tp + fn)
+    f1 = _safe_divide(2 * precision * recall, precision + recall)
+    return precision, recall, f1
+
+def aggregate_scores(tp, fp, fn):
+    """
+    Micro, macro and support-weighted precision/recall/F1 from per-label counts.
+    Counts may carry leading batch axes; the label axis is the last one.
+    """
+    precision, recall, f1 = precision_recall_f1(tp, fp, fn)
+    support = tp + fn
+    total_support = np.sum(support, axis=-1)
+    micro = precision_recall_f1(np.sum(tp, axis=-1), np.sum(fp, axis=-1), np.sum(fn, axis=-1))
+    weights = _safe_divide(support, total_support[..., None] if np.ndim(support) > 1 else total_support)
+    return {
+        'micro': micro,
+        'macro': (precision.mean(axis=-1), recall.mean(axis=-1), f1.mean(axis=-1)),
+        'weighted': tuple(np.sum(score * weights, axis=-1) for score in (precision, recall, f1))
+    }
+
+def top_k_recall(gt_matrix, ranks, k):
+    """Share of ground-truth labels found among the first k predicted labels."""
+    hits = np.count_nonzero(gt_matrix & (ranks < k))
+    total = np.count_nonzero(gt_matrix)
+    return hits / total if total else 0.0
+
+def prepare_label_matrices(ground_truth, predictions, vocabulary=None, restrict_to_ground_truth=False,
+                           label_index=None):
+    """
+    Parse ground truth and prediction columns into matrices over a shared vocabulary.
+
+    Args:
+        ground_truth: Iterable of comma-separated ground-truth labels (multi-label supported)
+        predictions: Iterable of comma-separated predictions, most confident first
+        vocabulary: Label vocabulary (optional, e.g. every category of the prompt registry).
+                    Defaults to all labels seen in ground truth and predictions.
+        restrict_to_ground_truth: Only count labels that appear in the ground truth, as the
+                                  legacy calculate_metrics.py did for false positives
+        label_index: Normalize both columns to canonical labels first (optional)
+
+    Returns:
+        tuple: (vocabulary, gt_matrix bool, pred_ranks int16)
+    """
+    gt_parsed = parse_label_column(ground_truth, label_index)
+    pred_parsed = parse_label_column(predictions, label_index)
+    if restrict_to_ground_truth:
+        vocabulary = build_vocabulary(gt_parsed[1])
+    elif vocabulary is None:
+        vocabulary = build_vocabulary(gt_parsed[1], pred_parsed[1])
+    vocabulary = list(vocabulary)
+    gt_matrix = rank_matrix(gt_parsed, vocabulary) != NOT_RANKED
+    return vocabulary, gt_matrix, rank_matrix(pred_parsed, vocabulary)
+
+def compute_metrics(ground_truth, predictions, vocabulary=None, restrict_to_ground_truth=False, top_k=(1, 3, 5),
+                    label_index=None):
+    """
+    Vectorized multi-label precision/recall/F1.
+
+    Returns:
+        tuple: (per-label pd.DataFrame with Label, Precision, Recall, F1, TP, FP, FN, Support,
+                followed by Micro, Macro and Weighted rows; dict of summary scores incl. top-k recall)
+    """
+    vocabulary, gt_matrix, pred_ranks = prepare_label_matrices(ground_truth, predictions, vocabulary,
+                                                               restrict_to_ground_truth, label_index)
+    pred_matrix = pred_ranks != NOT_RANKED
+    tp, fp, fn = confusion_counts(gt_matrix, pred_matrix)
+    precision, recall, f1 = precision_recall_f1(tp, fp, fn)
+
+    per_label = pd.DataFrame({
+        'Label': vocabulary,
+        'Precision': precision,
+        'Recall': recall,
+        'F1': f1,
+        'TP': tp,
+        'FP': fp,
+        'FN': fn,
+        'Support': tp + fn
+    })
+    # Labels that never occur in ground truth or predictions carry no information
+    per_label = per_label[(per_label['TP'] + per_label['FP'] + per_label['FN']) > 0].reset_index(drop=True)
+
+    summary = {}
+    aggregates = aggregate_scores(tp, fp, fn)
+    totals = {'TP': tp.sum(), 'FP': fp.sum(), 'FN': fn.sum(), 'Support': (tp + fn).sum()}
+    aggregate_rows = []
+    for label, (name, (p, r, f)) in zip(AGGREGATE_LABELS, aggregates.items()):
+        summary[f'{name}_precision'], summary[f'{name}_recall'], summary[f'{name}_f1'] = float(p), float(r), float(f)
+        aggregate_rows.append({'Label': label, 'Precision': float(p), 'Recall': float(r), 'F1': float(f), **totals})
+    for k in top_k:
+        summary[f'recall@{k}'] = float(top_k_recall(gt_matrix, pred_ranks, k))
+
+    report = pd.concat([per_label, pd.DataFrame(aggregate_rows)], ignore_index=True)
+    return report, summary
+
+if __name__ == "__main__":
+    # Usage: python label_metrics.py <result file> [--legacy-fp] [--normalize]
+    if len(sys.argv) < 2:
+        print("Usage: python label_metrics.py <xlsx_or_csv_file> [--legacy-fp] [--normalize]")
+        sys.exit(1)
+
+    result_file = sys.argv[1]
+    df = pd.read_csv(result_file) if result_file.endswith('.csv') else pd.read_excel(result_file)
+    label_index = None
+    if '--normalize' in sys.argv:
+        from label_index import get_label_index
+        label_index = get_label_index()
+    report, summary = compute_metrics(df['tag_gt'], df['inference_result'],
+                                      restrict_to_ground_truth='--legacy-fp' in sys.argv, label_index=label_index)
+
+    metric_file = result_file.rsplit('.', 1)[0] + '_metric_full.csv'
+    report.to_csv(metric_file, index=False)
+    for name, value in summary.items():
+        print(f"{name}: {value:.4f}")
+    print(f"Saved to {metric_file}")
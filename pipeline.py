@@ -0,0 +1,475 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+from bedrock_client import DEFAULT_MAX_POOL_CONNECTIONS
+from checkpoint import CheckpointWriter, checkpoint_to_excel, default_checkpoint_path, load_done_keys, row_key
+from compact_output import labels_from_ids
+from image_loader import download_image, format_from_content_type, prepare_local_image, read_image_file
+from image_preprocess import downscale_image
+from label_index import get_label_index
+from nova_prompt_v12 import _get_client, iter_sheet_rows, tag_image_bytes, warm_up_prompt_cache
+from pricing import estimate_cost
+from prompt_registry import DEFAULT_PROMPT_VERSION
+from rate_limiter import AdaptiveRateLimiter
+from response_decoder import LABEL_STATUSES, DecodeStatus, decode_response
+from result_cache import ResultCache
+from transcode import DerivedImageCache
+from url_fetcher import UrlFetcher, is_url
+
+# Seconds between queue-depth samples
+SAMPLE_INTERVAL = 0.05
+
+_STOP = object()
+
+class Stage:
+    """One pipeline stage: a function applied to each item by its own pool of worker threads."""
+
+    def __init__(self, name, function, workers=1, queue_size=None):
+        """
+        Args:
+            name: Stage name used in the statistics
+            function: Called with the item dict, updates and returns it; an exception
+                      marks the item as failed and later stages pass it through untouched
+            workers: Worker threads of this stage
+            queue_size: Capacity of the stage's input queue (default: 2 * workers).
+                        A full queue blocks the stage before it, which is the backpressure.
+        """
+        self.name = name
+        self.function = function
+        self.workers = max(1, int(workers))
+        self.queue_size = queue_size or 2 * self.workers
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.items = 0
+        self.errors = 0
+        # Running queue-depth statistics, so long runs keep no per-sample history
+        self.depth_samples = 0
+        self.depth_sum = 0
+        self.depth_max = 0
+        self.lock = threading.Lock()
+
+class Pipeline:
+    """
+    Producer/consumer pipeline over bounded queues. Each stage runs in its own worker
+    threads, so I/O-bound, CPU-bound (PIL releases the GIL while decoding and encoding)
+    and network-bound stages overlap instead of alternating per item.
+
+    Items are handed to the sink on the calling thread in input order. At most
+    max_in_flight items are between the source and the sink, so the reorder buffer
+    stays bounded when one item is slow.
+    """
+
+    def __init__(self, stages, max_in_flight=None):
+        self.stages = stages
+        self.max_in_flight = max_in_flight or sum(stage.queue_size + stage.workers for stage in stages)
+        self.elapsed_seconds = 0.0
+
+    def _worker(self, stage, input_queue, output_queue, remaining):
+        while True:
+            entry = input_queue.get()
+            if entry is _STOP:
+                # Let the sibling workers see the sentinel; the last one passes it on
+                input_queue.put(_STOP)
+                with stage.lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    output_queue.put(_STOP)
+                return
+            sequence, item = entry
+            if item.get('error') is None:
+                started = time.perf_counter()
+                try:
+                    item = stage.function(item)
+                except Exception as e:
+                    item['error'] = str(e)
+                    item['failed_stage'] = stage.name
+                    with stage.lock:
+                        stage.errors += 1
+                with stage.lock:
+                    stage.busy_seconds += time.perf_counter() - started
+                    stage.items += 1
+            started = time.perf_counter()
+            output_queue.put((sequence, item))
+            with stage.lock:
+                stage.blocked_seconds += time.perf_counter() - started
+
+    def run(self, items, sink):
+        """
+        Push items (dicts) through all stages and call sink(item) for each in input order.
+        Exceptions of the source iterator are re-raised here after the pipeline drains.
+        """
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        queues.append(queue.Queue())
+        in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        source_error = []
+        done = threading.Event()
+
+        def feed():
+            try:
+                for sequence, item in enumerate(items):
+                    in_flight.acquire()
+                    queues[0].put((sequence, item))
+            except Exception as e:
+                source_error.append(e)
+            finally:
+                queues[0].put(_STOP)
+
+        def sample():
+            while not done.wait(SAMPLE_INTERVAL):
+                for stage, stage_queue in zip(self.stages, queues):
+                    depth = stage_queue.qsize()
+                    stage.depth_samples += 1
+                    stage.depth_sum += depth
+                    stage.depth_max = max(stage.depth_max, depth)
+
+        start_time = time.perf_counter()
+        threads = [threading.Thread(target=feed, name='pipeline-source', daemon=True),
+                   threading.Thread(target=sample, name='pipeline-sampler', daemon=True)]
+        for position, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            threads.extend(threading.Thread(target=self._worker, args=(stage, queues[position], queues[position + 1],
+                                                                       remaining),
+                                            name=f"pipeline-{stage.name}-{i}", daemon=True)
+                           for i in range(stage.workers))
+        for thread in threads:
+            thread.start()
+
+        reorder = {}
+        next_sequence = 0
+        while True:
+            entry = queues[-1].get()
+            if entry is _STOP:
+                break
+            sequence, item = entry
+            reorder[sequence] = item
+            while next_sequence in reorder:
+                sink(reorder.pop(next_sequence))
+                next_sequence += 1
+                in_flight.release()
+
+        done.set()
+        for thread in threads:
+            thread.join()
+        self.elapsed_seconds = time.perf_counter() - start_time
+        if source_error:
+            raise source_error[0]
+
+    def stats(self):
+        """
+        Per-stage statistics: utilization is busy time over workers * wall time, and
+        queue depth is sampled every SAMPLE_INTERVAL seconds. See find_bottleneck for
+        how the bottleneck stage is picked from them.
+        """
+        rows = []
+        for stage in self.stages:
+            capacity = stage.workers * self.elapsed_seconds
+            rows.append({
+                'stage': stage.name,
+                'workers': stage.workers,
+                'items': stage.items,
+                'errors': stage.errors,
+                'busy_seconds': round(stage.busy_seconds, 3),
+                'utilization': round(stage.busy_seconds / capacity, 3) if capacity else 0.0,
+                'blocked_seconds': round(stage.blocked_seconds, 3),
+                'queue_capacity': stage.queue_size,
+                'mean_queue_depth': round(stage.depth_sum / stage.depth_samples, 2) if stage.depth_samples else 0.0,
+                'max_queue_depth': stage.depth_max
+            })
+        return rows
+
+def find_bottleneck(stats):
+    """
+    The stage with the highest utilization; among equally busy stages, the one whose
+    input queue is fullest on average relative to its capacity, as work piles up in
+    front of the slowest stage.
+    """
+    return max(stats, key=lambda row: (row['utilization'], row['mean_queue_depth'] / row['queue_capacity']))
+
+def print_stage_stats(stats):
+    print(f"⏱️  流水线阶段统计:")
+    for row in stats:
+        print(f"   • {row['stage']:<8} workers={row['workers']:<3} 利用率={row['utilization']:.0%} "
+              f"队列深度 平均/最大={row['mean_queue_depth']}/{row['max_queue_depth']} (容量 {row['queue_capacity']}) "
+              f"阻塞={row['blocked_seconds']:.1f}s 错误={row['errors']}")
+    if stats:
+        bottleneck = find_bottleneck(stats)
+        print(f"   • 瓶颈阶段: {bottleneck['stage']}")
+
+def tagging_stages(tagging_kwargs, load_workers=4, prepare_workers=None, request_workers=4, parse_workers=1,
+                   queue_size=None, max_long_edge=None, max_image_bytes=None, derived_cache=None, url_fetcher=None,
+                   label_ids=False, prompt_version=DEFAULT_PROMPT_VERSION, label_index=None):
+    """
+    The stages of tagging one image, as done in sequence by img_tagging:
+    load (file read or download) -> prepare (format sniffing, transcoding, downscaling)
+    -> request (Bedrock) -> parse (decode and normalize labels).
+
+    Args:
+        tagging_kwargs: Keyword arguments of tag_image_bytes (client, model_id, ...)
+        *_workers: Worker threads per stage (prepare defaults to one per CPU)
+        queue_size: Input queue capacity of every stage (default: 2 * its workers)
+        Other arguments are as for process_excel_data.
+    """
+    prepare_workers = prepare_workers or os.cpu_count() or 1
+
+    def load(item):
+        image_path = item['image_path']
+        if is_url(image_path):
+            if url_fetcher is not None:
+                item['data'], item['content_type'] = url_fetcher.fetch(image_path)
+            else:
+                item['data'], item['content_type'] = download_image(image_path)
+        elif not os.path.exists(image_path):
+            raise FileNotFoundError(f"Image file not found: {image_path}")
+        else:
+            item['data'] = read_image_file(image_path)
+        return item
+
+    def prepare(item):
+        data = item.pop('data')
+        if 'content_type' in item:
+            image_bytes, bedrock_format = data, format_from_content_type(item.pop('content_type'), item['image_path'])
+        else:
+            try:
+                image_bytes, bedrock_format = prepare_local_image(data, item['image_path'], derived_cache)
+            except Exception as e:
+                raise Exception(f"Failed to process image file: {str(e)}")
+        image_info = None
+        if max_long_edge or max_image_bytes:
+            image_bytes, bedrock_format, image_info = downscale_image(image_bytes, bedrock_format,
+                                                                      max_long_edge, max_image_bytes)
+        item['image'] = (image_bytes, bedrock_format, image_info)
+        return item
+
+    def request(item):
+        image_bytes, bedrock_format, image_info = item.pop('image')
+        item['result'], item['metrics'] = tag_image_bytes(image_bytes, bedrock_format, image_info, **tagging_kwargs)
+        return item
+
+    def parse(item):
+        inference_result, decode_status = decode_response(item['result'])
+        if label_ids and decode_status in LABEL_STATUSES:
+            inference_result = labels_from_ids(inference_result, prompt_version)
+        item['decode_status'] = decode_status
+        item['inference_result'] = inference_result
+        if label_index is not None and decode_status in LABEL_STATUSES:
+            labels, oov = label_index.canonicalize(inference_result)
+            # Unknown labels are kept, so they still count as false positives
+            item['inference_result'] = ','.join(labels + oov)
+            if item['inference_result'] != inference_result:
+                item['raw_inference_result'] = inference_result
+            if oov:
+                item['oov_labels'] = oov
+        return item
+
+    return [
+        Stage('load', load, load_workers, queue_size),
+        Stage('prepare', prepare, prepare_workers, queue_size),
+        Stage('request', request, request_workers, queue_size),
+        Stage('parse', parse, parse_workers, queue_size)
+    ]
+
+def process_excel_data_pipeline(excel_file, output_file='result.xlsx', images_dir='imgs', prompt=None,
+                                region="us-west-2", model_id="us.amazon.nova-lite-v1:0", aws_access_key_id=None,
+                                aws_secret_access_key=None, use_cache=True, load_workers=4, prepare_workers=None,
+                                request_workers=4, parse_workers=1, queue_size=None, requests_per_minute=None,
+                                tokens_per_minute=None, max_retries=3, result_cache_path=None, max_long_edge=None,
+                                max_image_bytes=None, checkpoint_file=None, resume=False, retry_failed=True,
+                                prompt_version=DEFAULT_PROMPT_VERSION, warm_up=True, normalize_labels=True,
+                                compact_output=False, label_ids=False, derived_cache_dir=None, url_cache_dir=None):
+    """
+    Tag a sheet like process_excel_data, but as a staged pipeline with bounded queues,
+    so file reads, PIL work and Bedrock calls of different rows overlap. Writes the same
+    checkpoint records and sheet, and reports per-stage utilization and queue depths.
+
+    Args:
+        load_workers: Threads reading files or downloading URLs
+        prepare_workers: Threads sniffing, transcoding and downscaling (default: one per CPU)
+        request_workers: Concurrent Bedrock calls
+        parse_workers: Threads decoding and normalizing answers
+        queue_size: Input queue capacity of every stage (default: 2 * its workers)
+        Other arguments are as for process_excel_data.
+
+    Returns:
+        dict: Run summary with request, error and token counts, cost and 'stages' statistics
+    """
+    if checkpoint_file is None:
+        if output_file is None:
+            raise ValueError("Either output_file or checkpoint_file must be given")
+        checkpoint_file = default_checkpoint_path(output_file)
+    done_keys = load_done_keys(checkpoint_file, retry_failed) if resume else set()
+
+    client = _get_client(region, aws_access_key_id, aws_secret_access_key, 
+                         max_pool_connections=max(DEFAULT_MAX_POOL_CONNECTIONS, request_workers))
+    rate_limiter = None
+    if requests_per_minute or tokens_per_minute:
+        rate_limiter = AdaptiveRateLimiter(requests_per_minute=requests_per_minute,
+                                           tokens_per_minute=tokens_per_minute)
+    result_cache = ResultCache(result_cache_path) if result_cache_path else None
+    derived_cache = DerivedImageCache(derived_cache_dir) if derived_cache_dir else None
+    url_fetcher = UrlFetcher(url_cache_dir, prefetch_workers=load_workers) if url_cache_dir else None
+    label_index = get_label_index() if normalize_labels else None
+
+    tagging_kwargs = {
+        'prompt': prompt,
+        'model_id': model_id,
+        'use_cache': use_cache,
+        'client': client,
+        'rate_limiter': rate_limiter,
+        'max_retries': max_retries,
+        'result_cache': result_cache,
+        'prompt_version': prompt_version,
+        'compact_output': compact_output,
+        'label_ids': label_ids
+    }
+    stages = tagging_stages(tagging_kwargs, load_workers, prepare_workers, request_workers, parse_workers,
+                            queue_size, max_long_edge, max_image_bytes, derived_cache, url_fetcher, label_ids,
+                            prompt_version, label_index)
+    pipeline = Pipeline(stages)
+
+    warm_up_metrics = None
+    if warm_up and use_cache and request_workers > 1:
+        try:
+            warm_up_metrics = warm_up_prompt_cache(client, model_id, region, prompt_version)
+        except Exception as e:
+            print(f"⚠️  Prompt cache warm-up failed: {str(e)}")
+
+    totals = Counter()
+    decode_failures = Counter()
+    oov_labels = Counter()
+    skipped_rows = 0
+
+    def iter_items():
+        nonlocal skipped_rows
+        for index, tag_gt, image_path in iter_sheet_rows(excel_file, images_dir):
+            if row_key(index, image_path) in done_keys:
+                skipped_rows += 1
+                continue
+            yield {'row_index': index, 'tag_gt': tag_gt, 'image_path': image_path, 'error': None}
+
+    print(f"开始处理 {excel_file} (流水线: 读取 {load_workers} / 预处理 {stages[1].workers} / "
+          f"请求 {request_workers} / 解析 {parse_workers})...")
+    print("=" * 60)
+
+    with CheckpointWriter(checkpoint_file, resume=resume) as checkpoint:
+        def sink(item):
+            # Runs on the calling thread only, so the counters need no lock
+            index = item['row_index']
+            decode_status = item.get('decode_status')
+            if item['error'] is None:
+                metrics = item['metrics']
+                totals['successful_requests'] += 1
+                totals['input_tokens'] += metrics['input_tokens']
+                totals['output_tokens'] += metrics['output_tokens']
+                totals['cache_read_tokens'] += metrics.get('cache_read_tokens', 0)
+                totals['cache_write_tokens'] += metrics.get('cache_creation_tokens', 0)
+                if metrics.get('result_cache_hit'):
+                    totals['result_cache_hits'] += 1
+                if decode_status == DecodeStatus.CONTENT_FILTERED:
+                    totals['content_filtered_requests'] += 1
+                elif decode_status != DecodeStatus.OK:
+                    decode_failures[decode_status.value] += 1
+                if item.get('oov_labels'):
+                    totals['oov_rows'] += 1
+                    oov_labels.update(item['oov_labels'])
+                print(f"✅ 处理第{index+1}行: {item['image_path']} -> {item['result']}")
+            else:
+                totals['failed_requests'] += 1
+                print(f"❌ 处理第{index+1}行出错 ({item.get('failed_stage')}): {item['image_path']} -> {item['error']}")
+
+            record = {
+                'row_index': index,
+                'tag_gt': item['tag_gt'],
+                'image_path': item['image_path'],
+                'inference_result': item.get('inference_result', f"错误: {item['error']}"),
+                'error': item['error'],
+                'decode_status': decode_status.value if decode_status else None,
+                'metrics': item.get('metrics')
+            }
+            for key in ('raw_inference_result', 'oov_labels'):
+                if key in item:
+                    record[key] = item[key]
+            checkpoint.write(record)
+            totals['processed_rows'] += 1
+
+        pipeline.run(iter_items(), sink)
+
+    if output_file:
+        checkpoint_to_excel(checkpoint_file, output_file)
+    if result_cache:
+        result_cache.close()
+    if url_fetcher:
+        url_fetcher.close()
+
+    total_cost = estimate_cost(model_id, totals['input_tokens'], totals['output_tokens'],
+                               totals['cache_read_tokens'], totals['cache_write_tokens'])
+    if total_cost is not None and warm_up_metrics:
+        total_cost += estimate_cost(model_id, warm_up_metrics['input_tokens'], warm_up_metrics['output_tokens'],
+                                    warm_up_metrics['cache_read_tokens'], warm_up_metrics['cache_creation_tokens'])
+    processed_rows = totals['processed_rows']
+    stage_stats = pipeline.stats()
+
+    print("=" * 60)
+    print(f"📋 处理完成总结:")
+    print(f"   • 总处理数据: {processed_rows} 条 ({pipeline.elapsed_seconds:.1f}s, "
+          f"{processed_rows / pipeline.elapsed_seconds if pipeline.elapsed_seconds else 0:.2f} 条/秒)")
+    if resume:
+        print(f"   • 跳过已完成: {skipped_rows} 条")
+    print(f"   • 成功请求: {totals['successful_requests']} 条")
+    print(f"   • 失败请求: {totals['failed_requests']} 条")
+    if decode_failures:
+        print(f"   • 解析失败: {sum(decode_failures.values())} 条")
+    print(f"   • 总输入/输出 Token: {totals['input_tokens']:,}/{totals['output_tokens']:,}")
+    if total_cost is not None:
+        print(f"   • 总费用: ${total_cost:.4f}")
+    print_stage_stats(stage_stats)
+    print("=" * 60)
+
+    return {
+        'total_rows': processed_rows,
+        'skipped_rows': skipped_rows,
+        'successful_requests': totals['successful_requests'],
+        'failed_requests': totals['failed_requests'],
+        'content_filtered_requests': totals['content_filtered_requests'],
+        'decode_failures': dict(decode_failures),
+        'oov_rows': totals['oov_rows'],
+        'oov_labels': dict(oov_labels),
+        'result_cache_hits': totals['result_cache_hits'],
+        'total_input_tokens': totals['input_tokens'],
+        'total_output_tokens': totals['output_tokens'],
+        'cache_read_tokens': totals['cache_read_tokens'],
+        'cache_write_tokens': totals['cache_write_tokens'],
+        'total_cost': total_cost,
+        'cost_per_image': total_cost / processed_rows if total_cost is not None and processed_rows else None,
+        'elapsed_seconds': pipeline.elapsed_seconds,
+        'stages': stage_stats
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tag a sheet with a staged load/prepare/request/parse pipeline")
+    parser.add_argument('excel_file')
+    parser.add_argument('images_dir')
+    parser.add_argument('--output', default='results/pipeline_result.xlsx')
+    parser.add_argument('--model-id', default="us.amazon.nova-lite-v1:0")
+    parser.add_argument('--region', default="us-west-2")
+    parser.add_argument('--load-workers', type=int, default=4)
+    parser.add_argument('--prepare-workers', type=int, default=None)
+    parser.add_argument('--request-workers', type=int, default=4)
+    parser.add_argument('--parse-workers', type=int, default=1)
+    parser.add_argument('--queue-size', type=int, default=None)
+    parser.add_argument('--max-long-edge', type=int, default=None)
+    parser.add_argument('--compact-output', action='store_true')
+    parser.add_argument('--resume', action='store_true')
+    args = parser.parse_args()
+
+    process_excel_data_pipeline(args.excel_file, args.output, args.images_dir, region=args.region,
+                                model_id=args.model_id, load_workers=args.load_workers,
+                                prepare_workers=args.prepare_workers, request_workers=args.request_workers,
+                                parse_workers=args.parse_workers, queue_size=args.queue_size,
+                                max_long_edge=args.max_long_edge, compact_output=args.compact_output,
+                                resume=args.resume)
@@ -0,0 +1,40 @@
+# On-demand Amazon Nova prices in USD per 1M tokens (input, output).
+# Update these when the Bedrock price list changes.
+NOVA_PRICING = {
+    'nova-micro': (0.035, 0.14),
+    'nova-lite': (0.06, 0.24),
+    'nova-pro': (0.8, 3.2),
+    'nova-premier': (2.5, 12.5)
+}
+# Prompt-cache reads are billed at a 75% discount; writes at the normal input price
+CACHE_READ_PRICE_FACTOR = 0.25
+CACHE_WRITE_PRICE_FACTOR = 1.0
+
+def get_model_pricing(model_id):
+    """
+    Return (input, output) USD per 1M tokens for a model ID or inference profile,
+    e.g. "us.amazon.nova-lite-v1:0", or None if the model is not in NOVA_PRICING.
+    """
+    for model_family, prices in NOVA_PRICING.items():
+        if model_family in model_id:
+            return prices
+    return None
+
+def estimate_cost(model_id, input_tokens, output_tokens, cache_read_tokens=0, cache_write_tokens=0):
+    """
+    Estimate the on-demand cost in USD of a request or a whole run.
+
+    input_tokens are the uncached input tokens, as reported in the Converse usage
+    inputTokens; cached tokens are passed separately.
+
+    Returns:
+        float or None: Cost in USD, or None if the model price is unknown
+    """
+    prices = get_model_pricing(model_id)
+    if prices is None:
+        return None
+    input_price, output_price = prices
+    return (input_tokens * input_price
+            + cache_read_tokens * input_price * CACHE_READ_PRICE_FACTOR
+            + cache_write_tokens * input_price * CACHE_WRITE_PRICE_FACTOR
+            + output_tokens * output_price) / 1_000_000
@@ -0,0 +1,169 @@
+import json
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from result_cache import ResultCache
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prompts')
+CATEGORY_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'categories_cn.txt')
+DEFAULT_PROMPT_VERSION = 'v12'
+
+# Placeholder in system.md replaced by the (full or filtered) reference categories
+CATEGORIES_PLACEHOLDER = '{{REFERENCE_CATEGORIES}}'
+
+Category = namedtuple('Category', ['number', 'name', 'definition', 'label', 'group', 'subgroup'])
+PromptTemplate = namedtuple('PromptTemplate', ['version', 'system', 'user', 'categories_text', 'categories'])
+
+_ENTRY_RE = re.compile(r'^(\d+)\. \*\*(.+)\*\*\s*$')
+_FIELD_RE = re.compile(r'^\s+- \*\*(Definition|OUTPUT_LABEL)\*\*: (.*)$')
+
+def _read_text(path):
+    # newline='' keeps the bytes exactly as stored, so rendered prompts are byte-identical
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+def parse_categories(categories_text):
+    """
+    Parse a categories.md block into Category entries.
+
+    "## " headings are top-level groups and "### " headings subgroups; each entry
+    is a numbered bold name followed by its Definition and OUTPUT_LABEL lines.
+    """
+    categories = []
+    group = subgroup = None
+    entry = None
+    for line in categories_text.splitlines():
+        if line.startswith('### '):
+            subgroup = line[4:].strip()
+        elif line.startswith('## '):
+            group, subgroup = line[3:].strip(), None
+        elif _ENTRY_RE.match(line):
+            number, name = _ENTRY_RE.match(line).groups()
+            entry = {'number': int(number), 'name': name, 'definition': '', 'label': '',
+                     'group': group, 'subgroup': subgroup}
+            categories.append(entry)
+        elif entry is not None and _FIELD_RE.match(line):
+            field, value = _FIELD_RE.match(line).groups()
+            entry['definition' if field == 'Definition' else 'label'] = value.strip()
+    return tuple(Category(**entry) for entry in categories)
+
+def render_categories(categories):
+    """Render Category entries back into the categories.md layout, with group headings."""
+    lines = []
+    group = subgroup = None
+    for category in categories:
+        if category.group != group:
+            group, subgroup = category.group, None
+            lines += [f"## {group}", ""]
+        if category.subgroup and category.subgroup != subgroup:
+            subgroup = category.subgroup
+            lines += [f"### {subgroup}", ""]
+        indent = ' ' * (len(str(category.number)) + 2)
+        lines += [
+            f"{category.number}. **{category.name}**",
+            f"{indent}- **Definition**: {category.definition}",
+            f"{indent}- **OUTPUT_LABEL**: {category.label}",
+            ""
+        ]
+    return '\n'.join(lines) + '\n'
+
+def load_category_table(path=CATEGORY_TABLE_PATH):
+    """
+    Load the Chinese category table (one {"name", "description"} object per line).
+
+    Lines that are not valid JSON are salvaged when the name and description can still
+    be recovered, otherwise skipped.
+
+    Returns:
+        list: dicts with 'name' and 'description'
+    """
+    table = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                match = re.search(r'"([^"]+)",\s*"description":\s*"([^"]*)"', line)
+                if not match:
+                    continue
+                entry = {'name': match.group(1), 'description': match.group(2)}
+            table.append({'name': entry['name'], 'description': entry.get('description', '')})
+    return table
+
+def _load_templates(prompts_dir=PROMPTS_DIR):
+    """Load every prompts/<version>/ directory (system.md, user.md, optional categories.md)."""
+    templates = {}
+    for version in sorted(os.listdir(prompts_dir)):
+        version_dir = os.path.join(prompts_dir, version)
+        if not os.path.isfile(os.path.join(version_dir, 'system.md')):
+            continue
+        categories_path = os.path.join(version_dir, 'categories.md')
+        categories_text = _read_text(categories_path) if os.path.exists(categories_path) else ''
+        templates[version] = PromptTemplate(
+            version=version,
+            system=_read_text(os.path.join(version_dir, 'system.md')),
+            user=_read_text(os.path.join(version_dir, 'user.md')),
+            categories_text=categories_text,
+            categories=parse_categories(categories_text)
+        )
+    return templates
+
+# Loaded once at import; every caller shares the same template strings
+TEMPLATES = _load_templates()
+CATEGORY_TABLE = load_category_table()
+
+def list_versions():
+    return sorted(TEMPLATES)
+
+def get_template(version=DEFAULT_PROMPT_VERSION):
+    try:
+        return TEMPLATES[version]
+    except KeyError:
+        raise ValueError(f"Unknown prompt version: {version} (available: {', '.join(list_versions())})")
+
+def get_categories(version=DEFAULT_PROMPT_VERSION):
+    """Category entries of a prompt version, in prompt order."""
+    return get_template(version).categories
+
+def get_groups(version=DEFAULT_PROMPT_VERSION):
+    """Top-level category groups of a prompt version, in prompt order."""
+    groups = []
+    for category in get_categories(version):
+        if category.group not in groups:
+            groups.append(category.group)
+    return groups
+
+@lru_cache(maxsize=256)
+def render_system_prompt(version=DEFAULT_PROMPT_VERSION, groups=None):
+    """
+    Render the system prompt of a version. The result is memoized, so every worker
+    sends the very same string and the prompt-cache cachePoint stays valid.
+
+    Args:
+        version: Prompt version (directory under prompts/)
+        groups: Tuple of top-level group names to keep (optional, all categories if None)
+    """
+    template = get_template(version)
+    if CATEGORIES_PLACEHOLDER not in template.system:
+        return template.system
+    if groups is None:
+        categories_text = template.categories_text
+    else:
+        categories_text = render_categories([c for c in template.categories if c.group in groups])
+    return template.system.replace(CATEGORIES_PLACEHOLDER, categories_text)
+
+def render_user_prompt(version=DEFAULT_PROMPT_VERSION):
+    return get_template(version).user
+
+@lru_cache(maxsize=256)
+def content_hash(system_prompt, user_prompt):
+    """Stable SHA-256 of a system/user prompt pair, the same value ResultCache.prompt_hash returns."""
+    return ResultCache.prompt_hash(system_prompt, user_prompt)
+
+def prompt_hash(version=DEFAULT_PROMPT_VERSION, groups=None):
+    """Stable content hash of a rendered prompt version."""
+    return content_hash(render_system_prompt(version, groups), render_user_prompt(version))
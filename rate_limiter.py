@@ -0,0 +1,170 @@
+import random
+import threading
+import time
+
+# Substrings of Bedrock errors that are worth retrying
+RETRYABLE_ERRORS = ('ThrottlingException', 'Too many tokens', 'ServiceUnavailable', 'ModelNotReadyException')
+# Substrings of Bedrock errors that mean we are over quota and should slow down
+THROTTLING_ERRORS = ('ThrottlingException', 'Too many tokens', 'Too many requests')
+
+def is_retryable_error(error):
+    """Return True if the error (exception or message) is a transient Bedrock error."""
+    error_str = str(error)
+    return any(marker in error_str for marker in RETRYABLE_ERRORS)
+
+def is_throttling_error(error):
+    """Return True if the error (exception or message) means the account quota was hit."""
+    error_str = str(error)
+    return any(marker in error_str for marker in THROTTLING_ERRORS)
+
+def full_jitter_backoff(attempt, base_delay=1.0, max_delay=30.0):
+    """
+    Exponential backoff with full jitter: a uniform delay in [0, min(max_delay, base_delay * 2**attempt)].
+    Spreading retries over the whole window keeps workers that were throttled
+    together from retrying together.
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`.
+
+    `reserve` never blocks: it takes the tokens immediately, letting the balance go
+    negative, and returns how long the caller must sleep before using them. Waiting
+    workers therefore queue up behind each other without holding the lock.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate_per_minute = float(rate_per_minute)
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate_per_minute / 60.0)
+        self.last_refill = now
+
+    def reserve(self, amount=1):
+        """Take `amount` tokens and return the number of seconds to wait before using them."""
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens * 60.0 / self.rate_per_minute
+
+    def give_back(self, amount):
+        """Return unused tokens (or take more, if `amount` is negative) after the real cost is known."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def set_rate(self, rate_per_minute):
+        """Change the refill rate, keeping tokens already accrued at the old rate."""
+        with self.lock:
+            self._refill()
+            self.rate_per_minute = float(rate_per_minute)
+
+class AdaptiveRateLimiter:
+    """
+    Rate limiter for Bedrock calls with separate requests-per-minute and
+    tokens-per-minute buckets and AIMD rate control.
+
+    Each call reserves one request and an estimate of its token cost (the running
+    average of the `usage` counts seen so far). Once the response arrives the
+    estimate is settled against the real usage. On ThrottlingException both rates
+    are cut multiplicatively; every successful call raises them additively back
+    towards the configured quota.
+
+    Usage:
+        limiter = AdaptiveRateLimiter(requests_per_minute=200, tokens_per_minute=400000)
+        reserved = limiter.acquire()
+        try:
+            response = client.converse(...)
+            limiter.record_success(reserved, response['usage'])
+        except Exception as e:
+            limiter.record_failure(reserved, e)
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, estimated_tokens_per_request=1000,
+                 decrease_factor=0.5, increase_fraction=0.02, min_rate_fraction=0.05, decrease_cooldown=2.0):
+        """
+        Args:
+            requests_per_minute: Account RPM quota (optional, no request limit if None)
+            tokens_per_minute: Account TPM quota (optional, no token limit if None)
+            estimated_tokens_per_request: Token estimate used until real usage is observed
+            decrease_factor: Multiplier applied to the rates on throttling (default: 0.5)
+            increase_fraction: Fraction of the quota added back after each success (default: 0.02)
+            min_rate_fraction: Lowest rate allowed, as a fraction of the quota (default: 0.05)
+            decrease_cooldown: Seconds during which further throttles do not cut the rate again,
+                               so one burst of concurrent rejections counts as a single signal
+        """
+        self.max_requests_per_minute = requests_per_minute
+        self.max_tokens_per_minute = tokens_per_minute
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.estimated_tokens = float(estimated_tokens_per_request)
+        self.decrease_factor = decrease_factor
+        self.increase_fraction = increase_fraction
+        self.min_rate_fraction = min_rate_fraction
+        self.decrease_cooldown = decrease_cooldown
+        # Current rate as a fraction of the configured quota, shared by both buckets
+        self.rate_fraction = 1.0
+        self.last_decrease = 0.0
+        self.throttle_count = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a request may be sent.
+
+        Returns:
+            int: Number of tokens reserved, to be passed to record_success/record_failure
+        """
+        reserved = int(self.estimated_tokens) if self.token_bucket else 0
+        wait = 0.0
+        if self.request_bucket:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.token_bucket:
+            wait = max(wait, self.token_bucket.reserve(reserved))
+        if wait > 0:
+            time.sleep(wait)
+        return reserved
+
+    def record_success(self, reserved, usage):
+        """Settle the token reservation against the response `usage` and increase the rate."""
+        used = usage.get('inputTokens', 0) + usage.get('outputTokens', 0)
+        if self.token_bucket:
+            self.token_bucket.give_back(reserved - used)
+        with self.lock:
+            # Exponential moving average of the per-request token cost
+            self.estimated_tokens = 0.8 * self.estimated_tokens + 0.2 * used
+            if self.rate_fraction < 1.0:
+                self._set_rate_fraction(min(1.0, self.rate_fraction + self.increase_fraction))
+
+    def record_failure(self, reserved, error):
+        """Refund the reservation of a failed call and back off if it was throttled."""
+        if self.token_bucket:
+            self.token_bucket.give_back(reserved)
+        if is_throttling_error(error):
+            self.on_throttle()
+
+    def on_throttle(self):
+        """Multiplicatively decrease both rates, at most once per cooldown period."""
+        with self.lock:
+            self.throttle_count += 1
+            now = time.monotonic()
+            if now - self.last_decrease < self.decrease_cooldown:
+                return
+            self.last_decrease = now
+            self._set_rate_fraction(max(self.min_rate_fraction, self.rate_fraction * self.decrease_factor))
+            print(f"🐢 Throttled, lowering rate to {self.rate_fraction:.0%} of quota")
+
+    def _set_rate_fraction(self, fraction):
+        self.rate_fraction = fraction
+        if self.request_bucket:
+            self.request_bucket.set_rate(self.max_requests_per_minute * fraction)
+        if self.token_bucket:
+            self.token_bucket.set_rate(self.max_tokens_per_minute * fraction)
@@ -0,0 +1,144 @@
+import json
+import re
+from collections import namedtuple
+from enum import Enum
+
+class DecodeStatus(Enum):
+    """Outcome of decoding one model response."""
+    OK = 'ok'
+    # The answer was cut off (e.g. by maxTokens); only complete labels were kept
+    TRUNCATED = 'truncated'
+    CONTENT_FILTERED = 'content_filtered'
+    EMPTY = 'empty'
+    # No JSON object in the text at all
+    NO_JSON = 'no_json'
+    # A JSON object that cannot be parsed and has no recoverable "result" value
+    INVALID_JSON = 'invalid_json'
+    # Valid JSON without a "result" key
+    MISSING_RESULT = 'missing_result'
+
+# Statuses whose result holds labels
+LABEL_STATUSES = (DecodeStatus.OK, DecodeStatus.TRUNCATED)
+
+DecodedResponse = namedtuple('DecodedResponse', ['result', 'status'])
+
+# The exact answer shape, optionally behind the ```json fence the assistant prefill opens
+_FAST_PATH_RE = re.compile(r'\s*(?:```(?:json)?\s*)?\{\s*"result"\s*:\s*"((?:[^"\\]|\\.)*)"\s*\}')
+# An opening "result" string, closed or not
+_RESULT_PREFIX_RE = re.compile(r'"result"\s*:\s*"((?:[^"\\]|\\.)*)(")?')
+_FENCE_RE = re.compile(r'```(?:json)?')
+_CONTENT_FILTER_MARKERS = ('content filters', 'blocked')
+_JSON_DECODER = json.JSONDecoder()
+
+def _unescape(value):
+    # Most answers have no escapes, so the matched text is used as is
+    if '\\' not in value:
+        return value
+    try:
+        return json.loads(f'"{value}"')
+    except json.JSONDecodeError:
+        return value
+
+def _result_text(value):
+    if isinstance(value, list):
+        return ','.join(str(item) for item in value)
+    return str(value)
+
+def _is_content_filtered(text):
+    lowered = text.lower()
+    return any(marker in lowered for marker in _CONTENT_FILTER_MARKERS)
+
+def _recover_truncated(text):
+    """
+    Labels of a "result" string that was cut off before its closing quote. The last
+    comma-separated piece may be a partial label and is dropped when others precede it.
+    """
+    match = _RESULT_PREFIX_RE.search(text)
+    if match is None:
+        return None
+    value = match.group(1)
+    # An escape cut in half leaves a dangling backslash
+    if value.endswith('\\') and not value.endswith('\\\\'):
+        value = value[:-1]
+    value = _unescape(value)
+    if match.group(2) is None and ',' in value:
+        value = value.rsplit(',', 1)[0]
+    value = value.strip().rstrip(',')
+    return value or None
+
+def decode_response(text):
+    """
+    Extract the labels from a raw model answer.
+
+    The exact {"result": "..."} shape is matched by a single precompiled regex;
+    anything else goes through content-filter detection, a JSON decode from the first
+    "{" and finally recovery of a truncated "result" string.
+
+    Returns:
+        DecodedResponse: (result, status). On failure, result is the answer without
+                         code fences, or "CONTENT_FILTERED" for filtered answers.
+    """
+    if text is None or not text.strip():
+        return DecodedResponse('', DecodeStatus.EMPTY)
+
+    match = _FAST_PATH_RE.match(text)
+    if match is not None:
+        return DecodedResponse(_unescape(match.group(1)), DecodeStatus.OK)
+
+    cleaned = _FENCE_RE.sub('', text).strip()
+    if _is_content_filtered(cleaned):
+        return DecodedResponse('CONTENT_FILTERED', DecodeStatus.CONTENT_FILTERED)
+
+    json_start = cleaned.find('{')
+    if json_start == -1:
+        return DecodedResponse(cleaned, DecodeStatus.NO_JSON)
+
+    try:
+        # raw_decode ignores whatever follows the object, no need to search for the last "}"
+        obj, _ = _JSON_DECODER.raw_decode(cleaned, json_start)
+    except json.JSONDecodeError:
+        recovered = _recover_truncated(cleaned)
+        if recovered is not None:
+            return DecodedResponse(recovered, DecodeStatus.TRUNCATED)
+        return DecodedResponse(cleaned, DecodeStatus.INVALID_JSON)
+
+    if not isinstance(obj, dict) or 'result' not in obj:
+        return DecodedResponse(cleaned, DecodeStatus.MISSING_RESULT)
+    return DecodedResponse(_result_text(obj['result']), DecodeStatus.OK)
+
+def decode_array_response(text, count):
+    """
+    Split the JSON array answer of a multi-image request into one result per image.
+
+    Items are matched to images by their "image" number (1-based), or by position when
+    they carry none.
+
+    Returns:
+        list or None: One DecodedResponse per image in image order, or None if the answer
+                      does not hold exactly one result per image
+    """
+    if text is None:
+        return None
+    cleaned = _FENCE_RE.sub('', text).strip()
+    array_start = cleaned.find('[')
+    if array_start == -1:
+        return None
+    try:
+        items, _ = _JSON_DECODER.raw_decode(cleaned, array_start)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(items, list) or len(items) != count:
+        return None
+
+    results = [None] * count
+    for position, item in enumerate(items):
+        if not isinstance(item, dict) or 'result' not in item:
+            return None
+        try:
+            index = int(item.get('image', position + 1)) - 1
+        except (TypeError, ValueError):
+            return None
+        if not 0 <= index < count or results[index] is not None:
+            return None
+        results[index] = DecodedResponse(_result_text(item['result']), DecodeStatus.OK)
+    return results
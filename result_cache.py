@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = 'cache/inference_results.sqlite'
+
+def sha256_hex(data):
+    """Return the SHA-256 hex digest of bytes or a str (UTF-8 encoded)."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+class ResultCache:
+    """
+    Persistent, content-addressed cache of model responses backed by SQLite.
+
+    Entries are keyed by the SHA-256 of the image bytes, the hash of the system and
+    user prompts, the model ID and the inferenceConfig, so any change to one of them
+    is a miss. Each entry stores the raw response text and the usage metrics of the
+    original call. Entries older than `max_age_days` are dropped, and once the cache
+    grows beyond `max_entries` or `max_bytes` the least recently used entries are
+    evicted. The cache is safe to share between worker threads.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=None, max_bytes=512 * 1024 * 1024,
+                 max_age_days=90, evict_every=500):
+        """
+        Args:
+            path: SQLite database file
+            max_entries: Maximum number of cached responses (optional)
+            max_bytes: Maximum total size of cached text and metrics (default: 512MB)
+            max_age_days: Entries older than this are evicted (optional, default: 90)
+            evict_every: Run eviction after this many writes (default: 500)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self.writes_since_evict = 0
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                image_sha256 TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                model_id TEXT NOT NULL,
+                inference_config TEXT NOT NULL,
+                text TEXT NOT NULL,
+                metrics TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_results_last_access ON results(last_access)')
+        self.conn.commit()
+        self.evict()
+
+    @staticmethod
+    def prompt_hash(system_prompt, user_prompt):
+        """Hash of the system and user prompts, used as part of the cache key."""
+        return sha256_hex(json.dumps([system_prompt, user_prompt], ensure_ascii=False))
+
+    @staticmethod
+    def make_key(image_sha256, prompt_hash, model_id, inference_config):
+        """Build the cache key from its content-addressed parts."""
+        config = json.dumps(inference_config, sort_keys=True)
+        return sha256_hex('\n'.join([image_sha256, prompt_hash, model_id, config]))
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Returns:
+            tuple or None: (text, metrics) of the original call, or None on a miss
+        """
+        with self.lock:
+            row = self.conn.execute('SELECT text, metrics FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute('UPDATE results SET last_access = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+        return row[0], json.loads(row[1])
+
+    def put(self, key, text, metrics, image_sha256, prompt_hash, model_id, inference_config):
+        """Store the raw response text and usage metrics of a successful call."""
+        metrics_json = json.dumps(metrics)
+        size = len(text.encode('utf-8')) + len(metrics_json)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, image_sha256, prompt_hash, model_id, json.dumps(inference_config, sort_keys=True),
+                 text, metrics_json, size, now, now)
+            )
+            self.conn.commit()
+            self.writes_since_evict += 1
+            run_eviction = self.writes_since_evict >= self.evict_every
+        if run_eviction:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones until under the size limits."""
+        with self.lock:
+            self.writes_since_evict = 0
+            if self.max_age_days is not None:
+                cutoff = time.time() - self.max_age_days * 86400
+                self.conn.execute('DELETE FROM results WHERE created_at < ?', (cutoff,))
+            if self.max_entries is not None:
+                self.conn.execute('''
+                    DELETE FROM results WHERE key IN (
+                        SELECT key FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_entries,))
+            if self.max_bytes is not None:
+                total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+                if total > self.max_bytes:
+                    # Walk from oldest access and delete until enough bytes are freed
+                    to_free = total - self.max_bytes
+                    keys = []
+                    for key, size in self.conn.execute('SELECT key, size FROM results ORDER BY last_access'):
+                        if to_free <= 0:
+                            break
+                        keys.append((key,))
+                        to_free -= size
+                    self.conn.executemany('DELETE FROM results WHERE key = ?', keys)
+            self.conn.commit()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
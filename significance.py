@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+
+from input_reader import iter_rows
+from label_metrics import (AGGREGATE_LABELS, NOT_RANKED, aggregate_scores, build_vocabulary, parse_label_column,
+                           precision_recall_f1, rank_matrix)
+
+DEFAULT_RESAMPLES = 10000
+# Upper bound on resamples x rows per batch, keeps the weight matrices around 64 MB
+MAX_BATCH_ELEMENTS = 2 ** 24
+METRICS = ('Precision', 'Recall', 'F1')
+
+def load_results(path, ground_truth_col='tag_gt', predictions_col='inference_result'):
+    """Load a result file (xlsx, csv, parquet or jsonl) written by process_excel_data or batch_inference."""
+    df = pd.DataFrame(list(iter_rows(path)))
+    return df.rename(columns={ground_truth_col: 'tag_gt', predictions_col: 'inference_result'})
+
+def align_results(df_a, df_b, key='image_path'):
+    """
+    Pair the rows of two result files on the image path, keeping ground truth from the first.
+
+    Returns:
+        tuple: (ground truth, predictions A, predictions B) as aligned Series
+    """
+    merged = df_a[[key, 'tag_gt', 'inference_result']].merge(
+        df_b[[key, 'inference_result']], on=key, how='inner', suffixes=('_a', '_b'))
+    if len(merged) < max(len(df_a), len(df_b)):
+        print(f"⚠️  Only {len(merged)} of {len(df_a)}/{len(df_b)} rows could be paired on {key}")
+    return merged['tag_gt'], merged['inference_result_a'], merged['inference_result_b']
+
+def _hit_matrices(gt_matrix, pred_matrix):
+    """Per-row TP/FP/FN indicators as float32, ready to be weighted by resampling counts."""
+    return tuple(m.astype(np.float32) for m in (gt_matrix & pred_matrix, ~gt_matrix & pred_matrix,
+                                                gt_matrix & ~pred_matrix))
+
+def _scores(tp, fp, fn):
+    """Per-label and aggregate scores of (resamples, labels) count arrays."""
+    per_label = dict(zip(METRICS, precision_recall_f1(tp, fp, fn)))
+    aggregates = {label: dict(zip(METRICS, scores))
+                  for label, scores in zip(AGGREGATE_LABELS, aggregate_scores(tp, fp, fn).values())}
+    return per_label, aggregates
+
+def _batches(n_resamples, num_rows):
+    batch_size = max(1, min(n_resamples, MAX_BATCH_ELEMENTS // max(num_rows, 1)))
+    for start in range(0, n_resamples, batch_size):
+        yield min(batch_size, n_resamples - start)
+
+def _bootstrap_weights(rng, batch, num_rows):
+    # Multiplicity of every row in each resample: the same as drawing row indices with replacement
+    return rng.multinomial(num_rows, np.full(num_rows, 1.0 / num_rows), size=batch).astype(np.float32)
+
+def _collect(samples, per_label, aggregates):
+    for metric in METRICS:
+        samples.setdefault(('label', metric), []).append(per_label[metric])
+        for label in AGGREGATE_LABELS:
+            samples.setdefault((label, metric), []).append(aggregates[label][metric])
+
+def _stack(samples):
+    return {key: np.concatenate(values) for key, values in samples.items()}
+
+def prepare_matrices(ground_truth, *prediction_columns, restrict_to_ground_truth=False):
+    """
+    Indicator matrices of ground truth and one or more aligned prediction columns over a
+    shared vocabulary.
+
+    Returns:
+        tuple: (vocabulary, gt_matrix, [pred_matrix, ...])
+    """
+    gt_parsed = parse_label_column(ground_truth)
+    pred_parsed = [parse_label_column(predictions) for predictions in prediction_columns]
+    if restrict_to_ground_truth:
+        vocabulary = build_vocabulary(gt_parsed[1])
+    else:
+        vocabulary = build_vocabulary(gt_parsed[1], *(parsed[1] for parsed in pred_parsed))
+    gt_matrix = rank_matrix(gt_parsed, vocabulary) != NOT_RANKED
+    return vocabulary, gt_matrix, [rank_matrix(parsed, vocabulary) != NOT_RANKED for parsed in pred_parsed]
+
+def _report(vocabulary, point, samples, alpha, value_name):
+    """Long-format table of point estimates and percentile intervals, per label and aggregate."""
+    low_q, high_q = 100 * alpha / 2, 100 * (1 - alpha / 2)
+    point_labels, point_aggregates = point
+    rows = []
+    for metric in METRICS:
+        low, high = np.percentile(samples[('label', metric)], [low_q, high_q], axis=0)
+        for i, label in enumerate(vocabulary):
+            rows.append({'Label': label, 'Metric': metric, value_name: point_labels[metric][i],
+                         'CI Low': low[i], 'CI High': high[i]})
+        for label in AGGREGATE_LABELS:
+            low, high = np.percentile(samples[(label, metric)], [low_q, high_q])
+            rows.append({'Label': label, 'Metric': metric, value_name: float(point_aggregates[label][metric]),
+                         'CI Low': low, 'CI High': high})
+    return pd.DataFrame(rows)
+
+def bootstrap_ci(ground_truth, predictions, n_resamples=DEFAULT_RESAMPLES, alpha=0.05, seed=0,
+                 restrict_to_ground_truth=False):
+    """
+    Percentile bootstrap confidence intervals of per-label and micro/macro/weighted
+    precision, recall and F1.
+
+    Resamples are drawn in batches as row-multiplicity matrices, so the TP/FP/FN counts of
+    a whole batch are a single matrix product with the per-row hit matrices.
+
+    Returns:
+        pd.DataFrame: Label, Metric, Value, CI Low, CI High
+    """
+    vocabulary, gt_matrix, (pred_matrix,) = prepare_matrices(
+        ground_truth, predictions, restrict_to_ground_truth=restrict_to_ground_truth)
+    hits = _hit_matrices(gt_matrix, pred_matrix)
+    num_rows = len(gt_matrix)
+    rng = np.random.default_rng(seed)
+
+    samples = {}
+    for batch in _batches(n_resamples, num_rows):
+        weights = _bootstrap_weights(rng, batch, num_rows)
+        _collect(samples, *_scores(*(weights @ hit for hit in hits)))
+
+    point = _scores(*(hit.sum(axis=0) for hit in hits))
+    return _report(vocabulary, point, _stack(samples), alpha, 'Value')
+
+def compare_predictions(ground_truth, predictions_a, predictions_b, n_resamples=DEFAULT_RESAMPLES,
+                        alpha=0.05, seed=0, restrict_to_ground_truth=False):
+    """
+    Paired comparison of two prediction columns over the same rows (B - A).
+
+    Reports the bootstrap CI of the difference, resampling rows jointly for A and B, and
+    the two-sided p-value of a paired permutation test that swaps the A/B predictions of
+    each row with probability 1/2.
+
+    Returns:
+        pd.DataFrame: Label, Metric, A, B, Difference, CI Low, CI High, p-value
+    """
+    vocabulary, gt_matrix, (pred_a, pred_b) = prepare_matrices(
+        ground_truth, predictions_a, predictions_b, restrict_to_ground_truth=restrict_to_ground_truth)
+    hits_a, hits_b = _hit_matrices(gt_matrix, pred_a), _hit_matrices(gt_matrix, pred_b)
+    num_rows = len(gt_matrix)
+    rng = np.random.default_rng(seed)
+
+    def difference(scores_a, scores_b):
+        (labels_a, aggregates_a), (labels_b, aggregates_b) = scores_a, scores_b
+        return ({metric: labels_b[metric] - labels_a[metric] for metric in METRICS},
+                {label: {metric: aggregates_b[label][metric] - aggregates_a[label][metric] for metric in METRICS}
+                 for label in AGGREGATE_LABELS})
+
+    point_a = _scores(*(hit.sum(axis=0) for hit in hits_a))
+    point_b = _scores(*(hit.sum(axis=0) for hit in hits_b))
+    observed = difference(point_a, point_b)
+
+    bootstrap_samples, permutation_samples = {}, {}
+    for batch in _batches(n_resamples, num_rows):
+        weights = _bootstrap_weights(rng, batch, num_rows)
+        _collect(bootstrap_samples, *difference(_scores(*(weights @ hit for hit in hits_a)),
+                                                 _scores(*(weights @ hit for hit in hits_b))))
+
+        swap = (rng.random((batch, num_rows)) < 0.5).astype(np.float32)
+        keep = 1.0 - swap
+        permuted_a = _scores(*(keep @ a + swap @ b for a, b in zip(hits_a, hits_b)))
+        permuted_b = _scores(*(swap @ a + keep @ b for a, b in zip(hits_a, hits_b)))
+        _collect(permutation_samples, *difference(permuted_a, permuted_b))
+
+    report = _report(vocabulary, observed, _stack(bootstrap_samples), alpha, 'Difference')
+    permutation_samples = _stack(permutation_samples)
+
+    values_a, values_b, p_values = [], [], []
+    for metric in METRICS:
+        # Small tolerance so ties with the observed difference count as "at least as extreme"
+        tolerance = 1e-12
+        extreme = np.abs(permutation_samples[('label', metric)]) >= np.abs(observed[0][metric]) - tolerance
+        p_values.extend((extreme.sum(axis=0) + 1) / (n_resamples + 1))
+        values_a.extend(point_a[0][metric])
+        values_b.extend(point_b[0][metric])
+        for label in AGGREGATE_LABELS:
+            extreme = np.abs(permutation_samples[(label, metric)]) >= abs(observed[1][label][metric]) - tolerance
+            p_values.append((extreme.sum() + 1) / (n_resamples + 1))
+            values_a.append(float(point_a[1][label][metric]))
+            values_b.append(float(point_b[1][label][metric]))
+
+    report.insert(2, 'A', values_a)
+    report.insert(3, 'B', values_b)
+    report['p-value'] = p_values
+    return report
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(
+        description="Bootstrap CIs of one result file, or a paired comparison of two (B - A)")
+    parser.add_argument('result_a', help="Result file, e.g. results/test_data_v11.xlsx")
+    parser.add_argument('result_b', nargs='?', help="Second result file to compare against the first")
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES)
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--legacy-fp', action='store_true',
+                        help="Only count false positives for ground-truth labels, like calculate_metrics.py")
+    parser.add_argument('--output', help="CSV output path (default: next to the first result file)")
+    args = parser.parse_args()
+
+    start = time.time()
+    df_a = load_results(args.result_a)
+    if args.result_b:
+        report = compare_predictions(*align_results(df_a, load_results(args.result_b)),
+                                     n_resamples=args.resamples, alpha=args.alpha, seed=args.seed,
+                                     restrict_to_ground_truth=args.legacy_fp)
+        suffix = '_significance.csv'
+    else:
+        report = bootstrap_ci(df_a['tag_gt'], df_a['inference_result'], n_resamples=args.resamples,
+                              alpha=args.alpha, seed=args.seed, restrict_to_ground_truth=args.legacy_fp)
+        suffix = '_bootstrap.csv'
+
+    output = args.output or args.result_a.rsplit('.', 1)[0] + suffix
+    report.to_csv(output, index=False)
+
+    with pd.option_context('display.float_format', '{:.4f}'.format, 'display.width', 200):
+        print(report[report['Label'].isin(AGGREGATE_LABELS)].to_string(index=False))
+    print(f"{args.resamples} resamples in {time.time() - start:.1f}s, saved to {output}")
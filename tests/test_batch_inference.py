@@ -0,0 +1,131 @@
+import json
+import os
+
+import pandas as pd
+
+from batch_inference import ASSISTANT_PREFILL, run_batch_tagging
+from checkpoint import iter_checkpoint
+from compact_output import build_inference_config
+
+JOB_ARN = 'arn:aws:bedrock:us-west-2:123456789012:model-invocation-job/job1'
+
+
+class FakeS3:
+    """In-memory stand-in for the S3 calls of batch_inference."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_file(self, filename, bucket, key):
+        with open(filename, 'rb') as f:
+            self.objects[(bucket, key)] = f.read()
+
+    def download_file(self, bucket, key, filename):
+        with open(filename, 'wb') as f:
+            f.write(self.objects[(bucket, key)])
+
+    def get_paginator(self, operation_name):
+        assert operation_name == 'list_objects_v2'
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        keys = sorted(key for bucket, key in self.objects if bucket == Bucket and key.startswith(Prefix))
+        # Two pages, as S3 returns large listings
+        yield {'Contents': [{'Key': key} for key in keys[:1]]}
+        yield {'Contents': [{'Key': key} for key in keys[1:]]}
+
+
+class FakeBedrock:
+    """
+    Stand-in for the bedrock control plane: a created job reads its input from FakeS3
+    and writes one output line per record it has an answer for.
+    """
+
+    def __init__(self, s3, answers):
+        self.s3 = s3
+        self.answers = answers
+        self.jobs = {}
+        self.polls = 0
+
+    def create_model_invocation_job(self, jobName, roleArn, modelId, inputDataConfig, outputDataConfig):
+        input_bucket, input_key = inputDataConfig['s3InputDataConfig']['s3Uri'][len('s3://'):].split('/', 1)
+        output_bucket, output_prefix = outputDataConfig['s3OutputDataConfig']['s3Uri'][len('s3://'):].split('/', 1)
+        lines = []
+        for line in self.s3.objects[(input_bucket, input_key)].decode('utf-8').splitlines():
+            record = json.loads(line)
+            answer = self.answers.get(record['recordId'])
+            if answer is None:
+                continue
+            if isinstance(answer, dict):
+                lines.append({'recordId': record['recordId'], 'modelInput': record['modelInput'], 'error': answer})
+            else:
+                lines.append({'recordId': record['recordId'], 'modelInput': record['modelInput'], 'modelOutput': {
+                    'output': {'message': {'role': 'assistant', 'content': [{'text': answer}]}},
+                    'usage': {'inputTokens': 1000, 'outputTokens': 10}
+                }})
+        output_key = f"{output_prefix.rstrip('/')}/job1/{os.path.basename(input_key)}.out"
+        self.s3.objects[(output_bucket, output_key)] = '\n'.join(
+            json.dumps(line, ensure_ascii=False) for line in lines).encode('utf-8')
+        # Unrelated files of the job that must not be parsed
+        self.s3.objects[(output_bucket, f"{output_prefix.rstrip('/')}/job1/manifest.json.out")] = b'{}'
+        self.jobs[JOB_ARN] = {'jobName': jobName, 'roleArn': roleArn, 'modelId': modelId}
+        return {'jobArn': JOB_ARN}
+
+    def get_model_invocation_job(self, jobIdentifier):
+        self.polls += 1
+        return {'jobArn': jobIdentifier, 'status': 'InProgress' if self.polls == 1 else 'Completed'}
+
+
+def test_run_batch_tagging_offline(tmp_path):
+    input_file = tmp_path / 'test_data.csv'
+    pd.DataFrame({
+        'tag_gt': ['刀具', '刀具', '警棍/甩棍', '刀具', '刀具'],
+        'image': ['a.jpg', 'b.png', 'c.jpg', 'd.jpg', 'e.jpg']
+    }).to_csv(input_file, index=False)
+    output_file = tmp_path / 'result.xlsx'
+
+    s3 = FakeS3()
+    bedrock = FakeBedrock(s3, {
+        # b.png (00000001) is not a supported batch format and never reaches the job
+        '00000000': '\n{"result":"刀具，警棍、甩棍"}\n```',
+        '00000002': {'errorCode': 400, 'errorMessage': 'Malformed input image'},
+        # d.jpg (00000003) is missing from the output
+        '00000004': '\n{"result":"刀具,不存在的标签"}\n```'
+    })
+
+    result_df = run_batch_tagging(str(input_file), str(output_file), 'arn:aws:iam::123456789012:role/batch',
+                                  's3://bucket/batch/input.jsonl', 's3://bucket/batch/output/',
+                                  job_name='test-job', work_dir=str(tmp_path / 'batch_jobs'), poll_interval=0,
+                                  bedrock_client=bedrock, s3_client=s3)
+
+    job_dir = tmp_path / 'batch_jobs' / 'test-job'
+    with open(job_dir / 'input.jsonl', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [record['recordId'] for record in records] == ['00000000', '00000002', '00000003', '00000004']
+    assert s3.objects[('bucket', 'batch/input.jsonl')] == (job_dir / 'input.jsonl').read_bytes()
+    model_input = records[0]['modelInput']
+    assert model_input['schemaVersion'] == 'messages-v1'
+    assert model_input['inferenceConfig'] == build_inference_config()
+    assert model_input['messages'][0]['content'][0]['image']['source']['s3Location']['uri'].endswith('/a.jpg')
+    assert model_input['messages'][1] == {'role': 'assistant', 'content': [{'text': ASSISTANT_PREFILL}]}
+    assert bedrock.jobs[JOB_ARN]['jobName'] == 'test-job'
+
+    with open(job_dir / 'manifest.jsonl', encoding='utf-8') as f:
+        manifest = [json.loads(line) for line in f]
+    assert [entry['image_path'] for entry in manifest] == ['a.jpg', 'b.png', 'c.jpg', 'd.jpg', 'e.jpg']
+    assert [('error' in entry) for entry in manifest] == [False, True, False, False, False]
+
+    expected = [
+        ['刀具', 'a.jpg', '刀具,警棍/甩棍'],
+        ['刀具', 'b.png', '错误: Unsupported image format for batch inference: b.png'],
+        ['警棍/甩棍', 'c.jpg', '错误: Malformed input image'],
+        ['刀具', 'd.jpg', '错误: missing from batch output'],
+        ['刀具', 'e.jpg', '刀具,不存在的标签']
+    ]
+    assert result_df.values.tolist() == expected
+    assert pd.read_excel(output_file).values.tolist() == expected
+
+    rows = list(iter_checkpoint(str(job_dir / 'results.jsonl')))
+    assert rows[0]['raw_inference_result'] == '刀具，警棍、甩棍'
+    assert rows[4]['oov_labels'] == ['不存在的标签']
+    assert [row['error'] is not None for row in rows] == [False, True, True, True, False]
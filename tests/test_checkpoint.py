@@ -0,0 +1,45 @@
+import json
+
+from checkpoint import CheckpointWriter, iter_checkpoint, load_done_keys, truncate_partial_line
+
+
+def _record(row_index, error=None):
+    return {'row_index': row_index, 'tag_gt': '刀具', 'image_path': f'imgs/{row_index}.jpg',
+            'inference_result': '刀具', 'error': error}
+
+
+def test_resume_drops_truncated_final_line(tmp_path):
+    path = tmp_path / 'result.checkpoint.jsonl'
+    with CheckpointWriter(str(path)) as writer:
+        writer.write(_record(0))
+        writer.write(_record(1))
+    # Simulate a crash in the middle of writing row 2
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(_record(2), ensure_ascii=False)[:20])
+
+    with CheckpointWriter(str(path), resume=True) as writer:
+        writer.write(_record(2))
+        writer.write(_record(3))
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['row_index'] for line in lines] == [0, 1, 2, 3]
+    assert [record['row_index'] for record in iter_checkpoint(str(path))] == [0, 1, 2, 3]
+    assert load_done_keys(str(path)) == {f'{i}:imgs/{i}.jpg' for i in range(4)}
+
+
+def test_truncate_partial_line(tmp_path):
+    path = tmp_path / 'checkpoint.jsonl'
+    assert truncate_partial_line(str(path)) == 0
+
+    path.write_bytes(b'{"a": 1}\n')
+    assert truncate_partial_line(str(path)) == 0
+    assert path.read_bytes() == b'{"a": 1}\n'
+
+    # A cut-off line longer than one read chunk
+    path.write_bytes(b'{"a": 1}\n' + b'x' * 10000)
+    assert truncate_partial_line(str(path)) == 10000
+    assert path.read_bytes() == b'{"a": 1}\n'
+
+    path.write_bytes(b'{"a": ')
+    assert truncate_partial_line(str(path)) == 6
+    assert path.read_bytes() == b''
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from PIL import Image
+
+from image_loader import read_image_file, sniff_image_format, to_rgb
+
+DEFAULT_DERIVED_CACHE_DIR = 'cache/derived'
+# Same quality as image_loader.convert_to_jpeg_bytes, so cached and inline conversions match
+JPEG_QUALITY = 95
+# Bump when the conversion itself changes, so old derived files are not reused
+TRANSCODE_VERSION = 1
+DEFAULT_CHUNKSIZE = 16
+
+def derived_key(source_sha256, quality=JPEG_QUALITY):
+    """Content address of a derived JPEG: hash of the source bytes plus the conversion parameters."""
+    params = json.dumps({'quality': quality, 'background': 'white', 'version': TRANSCODE_VERSION},
+                        sort_keys=True)
+    return hashlib.sha256(f"{source_sha256}:{params}".encode('utf-8')).hexdigest()
+
+def transcode_to_jpeg(data, quality=JPEG_QUALITY):
+    """Decode any PIL-readable image, flatten transparency onto white and encode as JPEG."""
+    with Image.open(BytesIO(data)) as img:
+        img = to_rgb(img)
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG', quality=quality)
+        return buffer.getvalue()
+
+class DerivedImageCache:
+    """
+    Content-addressed on-disk cache of images converted to JPEG (AVIF and other formats
+    Bedrock does not accept). Files live under <root>/<key[:2]>/<key>.jpg and are written
+    atomically, so concurrent workers and processes can share one cache directory.
+    """
+
+    def __init__(self, root=DEFAULT_DERIVED_CACHE_DIR, quality=JPEG_QUALITY):
+        self.root = root
+        self.quality = quality
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.jpg")
+
+    def get(self, key):
+        try:
+            with open(self.path_for(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, jpeg_bytes):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file in the same directory and rename, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(jpeg_bytes)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def jpeg_bytes(self, data):
+        """
+        JPEG bytes of an image file's contents, from the cache or converted and stored.
+        Called by image_loader.load_local_image for images that need conversion.
+        """
+        key = derived_key(hashlib.sha256(data).hexdigest(), self.quality)
+        cached = self.get(key)
+        with self.lock:
+            if cached is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is not None:
+            return cached
+        try:
+            jpeg_bytes = transcode_to_jpeg(data, self.quality)
+        except Exception as e:
+            raise Exception(f"Failed to convert image to JPEG: {str(e)}")
+        self.put(key, jpeg_bytes)
+        return jpeg_bytes
+
+def transcode_file(image_path, cache_dir=DEFAULT_DERIVED_CACHE_DIR, quality=JPEG_QUALITY):
+    """
+    Make sure the derived JPEG of one file is in the cache.
+
+    Returns:
+        tuple: (image_path, status, error). status is 'converted', 'cached', 'skipped'
+               (already in a format Bedrock accepts) or 'error'.
+    """
+    try:
+        data = read_image_file(image_path)
+        _, needs_conversion = sniff_image_format(data, image_path)
+        if not needs_conversion:
+            return image_path, 'skipped', None
+        cache = DerivedImageCache(cache_dir, quality)
+        cache.jpeg_bytes(data)
+        return image_path, 'cached' if cache.hits else 'converted', None
+    except Exception as e:
+        return image_path, 'error', str(e)
+
+def _transcode(args):
+    return transcode_file(*args)
+
+def transcode_images(image_paths, cache_dir=DEFAULT_DERIVED_CACHE_DIR, quality=JPEG_QUALITY, max_workers=None,
+                     chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Transcode images that need conversion into the derived cache across a process pool,
+    so inference only reads ready-to-send JPEG bytes.
+
+    Returns:
+        list: (image_path, status, error) per image, in input order
+    """
+    tasks = [(image_path, cache_dir, quality) for image_path in image_paths]
+    if max_workers == 1 or len(tasks) <= chunksize:
+        return [_transcode(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_transcode, tasks, chunksize=chunksize))
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from collections import Counter
+
+    from audit_images import iter_image_files
+
+    parser = argparse.ArgumentParser(description="Transcode AVIF and other unsupported images into the derived JPEG cache")
+    parser.add_argument('images_dir', help="Directory containing the images")
+    parser.add_argument('--cache-dir', default=DEFAULT_DERIVED_CACHE_DIR)
+    parser.add_argument('--quality', type=int, default=JPEG_QUALITY)
+    parser.add_argument('--recursive', action='store_true')
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    paths = [path for path, _ in iter_image_files(args.images_dir, recursive=args.recursive)]
+    results = transcode_images(paths, args.cache_dir, args.quality, args.workers)
+    statuses = Counter(status for _, status, _ in results)
+    print(f"🔄 {len(results)} files in {time.time() - start_time:.1f}s: {statuses['converted']} converted, "
+          f"{statuses['cached']} already cached, {statuses['skipped']} need no conversion, {statuses['error']} errors")
+    for image_path, status, error in results:
+        if status == 'error':
+            print(f"❌ {image_path}: {error}")
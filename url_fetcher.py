@@ -0,0 +1,275 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from result_cache import sha256_hex
+
+DEFAULT_URL_CACHE_DIR = 'cache/url_blobs'
+# Bedrock rejects larger images anyway
+DEFAULT_MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+DEFAULT_PER_HOST_LIMIT = 4
+# (connect, read) timeouts in seconds; the read timeout applies per chunk, not to the whole body
+DEFAULT_TIMEOUT = (5, 30)
+# Cached downloads younger than this are used without revalidation
+DEFAULT_MAX_AGE_SECONDS = 24 * 3600
+CHUNK_SIZE = 64 * 1024
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/91.0.4472.124 Safari/537.36')
+
+def is_url(image_input):
+    return isinstance(image_input, str) and image_input.startswith(('http://', 'https://'))
+
+class UrlFetcher:
+    """
+    Image downloader with one pooled keep-alive session, a concurrency limit per host,
+    streaming downloads capped at max_bytes and an on-disk content-addressed blob cache.
+
+    Blobs are stored once per content under <cache_dir>/<sha[:2]>/<sha>, and an SQLite
+    index maps each URL to its blob with the ETag and Last-Modified of the response.
+    Entries older than max_age are revalidated with a conditional request, and a
+    304 Not Modified reuses the blob without downloading it again. prefetch() starts
+    downloads in a background pool, and fetch() of a URL still in flight waits for it,
+    so downloads can run ahead of inference. Safe to share between threads.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_URL_CACHE_DIR, max_bytes=DEFAULT_MAX_DOWNLOAD_BYTES,
+                 per_host_limit=DEFAULT_PER_HOST_LIMIT, timeout=DEFAULT_TIMEOUT, max_age=DEFAULT_MAX_AGE_SECONDS,
+                 max_retries=3, prefetch_workers=8):
+        """
+        Args:
+            cache_dir: Directory of the blob cache and its index
+            max_bytes: Largest accepted download, checked against Content-Length and while streaming
+            per_host_limit: Maximum concurrent requests to one host
+            timeout: requests timeout, (connect, read) in seconds
+            max_age: Seconds a cached download is used without revalidation (0: always revalidate)
+            max_retries: Retries on connection errors and 429/5xx responses, with backoff
+            prefetch_workers: Threads of the background prefetch pool
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.max_age = max_age
+        self.prefetch_workers = prefetch_workers
+        self.lock = threading.Lock()
+        self.host_limits = {}
+        self.inflight = {}
+        self.executor = None
+        self.stats = {'downloads': 0, 'cache_hits': 0, 'not_modified': 0, 'bytes_downloaded': 0}
+
+        retry = Retry(total=max_retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=('GET',), raise_on_status=False)
+        # Connections are kept alive per host; the pool holds as many as may be used at once
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max(per_host_limit, prefetch_workers),
+                              max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.host_limits:
+                self.host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self.host_limits[host]
+
+    def _blob_path(self, sha256):
+        return os.path.join(self.cache_dir, sha256[:2], sha256)
+
+    def _read_blob(self, sha256):
+        try:
+            with open(self._blob_path(sha256), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_blob(self, data):
+        sha256 = sha256_hex(data)
+        path = self._blob_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return sha256
+
+    def _lookup(self, url):
+        with self.lock:
+            return self.conn.execute('SELECT sha256, content_type, etag, last_modified, fetched_at FROM urls '
+                                     'WHERE url = ?', (url,)).fetchone()
+
+    def _record(self, url, sha256, content_type, etag, last_modified):
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?, ?, ?)',
+                              (url, sha256, content_type, etag, last_modified, time.time()))
+            self.conn.commit()
+
+    def _count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def _download(self, url):
+        entry = self._lookup(url)
+        cached = self._read_blob(entry[0]) if entry else None
+        if cached is not None and time.time() - entry[4] < self.max_age:
+            self._count('cache_hits')
+            return cached, entry[1] or ''
+
+        headers = {}
+        if cached is not None:
+            if entry[2]:
+                headers['If-None-Match'] = entry[2]
+            if entry[3]:
+                headers['If-Modified-Since'] = entry[3]
+
+        with self._host_limit(url):
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304 and cached is not None:
+                    self._record(url, entry[0], entry[1], response.headers.get('ETag', entry[2]),
+                                 response.headers.get('Last-Modified', entry[3]))
+                    self._count('not_modified')
+                    return cached, entry[1] or ''
+                response.raise_for_status()
+
+                content_length = response.headers.get('Content-Length')
+                if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+                    raise Exception(f"Image is {int(content_length)} bytes, over the {self.max_bytes} byte limit")
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    size += len(chunk)
+                    # Content-Length can be missing or wrong, so the cap is enforced while streaming too
+                    if size > self.max_bytes:
+                        raise Exception(f"Image exceeds the {self.max_bytes} byte limit")
+                    chunks.append(chunk)
+                data = b''.join(chunks)
+                content_type = response.headers.get('Content-Type', '')
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+
+        self._record(url, self._write_blob(data), content_type, etag, last_modified)
+        self._count('downloads')
+        self._count('bytes_downloaded', len(data))
+        return data, content_type
+
+    def fetch(self, url):
+        """
+        Image bytes of a URL from the blob cache, a prefetch in flight or a new download.
+
+        Returns:
+            tuple: (raw bytes, content-type header), as image_loader.download_image
+        """
+        with self.lock:
+            future = self.inflight.get(url)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.inflight[url] = future
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._download(url)
+        except Exception as e:
+            error = Exception(f"Failed to download image from URL: {str(e)}")
+            future.set_exception(error)
+            raise error
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                self.inflight.pop(url, None)
+
+    def _prefetch_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.prefetch_workers,
+                                                   thread_name_prefix='url-prefetch')
+            return self.executor
+
+    def prefetch(self, url):
+        """Start downloading a URL in the background pool; errors surface in a later fetch()."""
+        def run():
+            try:
+                self.fetch(url)
+            except Exception:
+                # The row's own fetch() retries and reports the error
+                pass
+        self._prefetch_executor().submit(run)
+
+    def prefetch_all(self, urls):
+        """Download many URLs in the prefetch pool and wait for them. Returns {url: error or None}."""
+        executor = self._prefetch_executor()
+        futures = {url: executor.submit(self.fetch, url) for url in dict.fromkeys(urls)}
+        errors = {}
+        for url, future in futures.items():
+            try:
+                future.result()
+                errors[url] = None
+            except Exception as e:
+                errors[url] = str(e)
+        return errors
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        self.session.close()
+        with self.lock:
+            self.conn.close()
+
+if __name__ == "__main__":
+    import argparse
+
+    from input_reader import iter_rows as iter_input_rows
+
+    parser = argparse.ArgumentParser(description="Prefetch the image URLs of a sheet into the blob cache")
+    parser.add_argument('input_file', help="Sheet with an image URL column (xlsx, csv, parquet or jsonl)")
+    parser.add_argument('--column', default='image', help="Column holding the URLs (default: %(default)s)")
+    parser.add_argument('--cache-dir', default=DEFAULT_URL_CACHE_DIR)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--per-host-limit', type=int, default=DEFAULT_PER_HOST_LIMIT)
+    parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_DOWNLOAD_BYTES)
+    args = parser.parse_args()
+
+    urls = [row[args.column] for row in iter_input_rows(args.input_file) if is_url(row.get(args.column))]
+    start_time = time.time()
+    fetcher = UrlFetcher(args.cache_dir, args.max_bytes, args.per_host_limit, prefetch_workers=args.workers)
+    errors = fetcher.prefetch_all(urls)
+    failed = {url: error for url, error in errors.items() if error}
+    print(f"⬇️  {len(errors)} URLs in {time.time() - start_time:.1f}s: {fetcher.stats['downloads']} downloaded "
+          f"({fetcher.stats['bytes_downloaded'] / 1024 / 1024:.1f}MB), {fetcher.stats['cache_hits']} cached, "
+          f"{fetcher.stats['not_modified']} not modified, {len(failed)} failed")
+    for url, error in list(failed.items())[:20]:
+        print(f"❌ {url}: {error}")
+    fetcher.close()